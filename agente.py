@@ -1,10 +1,72 @@
-import random
-from tablero import Tablero
+from typing import Tuple, Dict, Protocol
+from collections.abc import Mapping
+import json
+from tablero import Tablero, INDICE_ACCION
+from qtabla import QTablaDensa
 import numpy as np
 
+# Cantidad de números aleatorios que el agente genera por bloque
+TAM_BLOQUE_RNG = 4096
+
+
+def mapa_acciones(tablero: Tablero, listas: tuple) -> list:
+    """
+    Lista estado -> acciones válidas (índice 0 sin uso) sin una lista nueva por estado: todas las
+    celdas del mismo tipo apuntan al mismo elemento de 'listas' (acciones, columnas o slices de la Q-tabla).
+    Tipos: 0 = celda normal, 1 = inicio de escalera/rodadero, 2 = celda terminal
+    """
+    validas = tablero.acciones_validas
+    tipos = np.where(validas[:, INDICE_ACCION["auto"]], 1, np.where(validas[:, INDICE_ACCION[None]], 2, 0))
+    return list(map(listas.__getitem__, tipos.tolist()))
+
+
+class Agente(Protocol):
+    """
+    Interfaz que simulacion.run, los checkpoints (helpers) y la evaluación esperan de un agente tabular.
+        - run: pos, epsilon, escoger_accion, actualizar_Q, reiniciar_episodio (al inicio de cada
+          episodio), max_Q_estados (snapshots) y obtener_Qmax_politica (reporte)
+        - Checkpoints: Qtabla, tabla_densa, estado_rng/restaurar_rng y estado_extra/restaurar_estado_extra
+          (arrays propios del agente además de la Q-tabla, p.ej. la segunda tabla de Double Q-learning)
+    Todos los agentes de este módulo heredan de AgenteQLearning y comparten su Q-tabla (densa o
+    diccionario), su generador aleatorio y las tablas del tablero.
+    """
+    tablero: Tablero
+    pos: int
+    alpha: float
+    epsilon: float
+    gamma: float
+    tabla_densa: bool
+    Qtabla: Mapping
+
+    def escoger_accion(self, estado): ...
+
+    def actualizar_Q(self, estado, accion, reward, estado_siguiente) -> None: ...
+
+    def reiniciar_episodio(self) -> None: ...
+
+    def max_Q_estados(self, estados) -> np.ndarray: ...
+
+    def obtener_Qmax_politica(self) -> Tuple[np.ndarray, np.ndarray]: ...
+
+    def estado_rng(self) -> str: ...
+
+    def restaurar_rng(self, estado: str) -> None: ...
+
+    def estado_extra(self) -> Dict[str, np.ndarray]: ...
+
+    def restaurar_estado_extra(self, arrays: Dict[str, np.ndarray]) -> None: ...
+
 
 class AgenteQLearning:
-    def __init__(self, tablero: Tablero, alpha: float = 0.5, epsilon: float = 0.65, gamma: float = 0.9):
+    def __init__(
+        self,
+        tablero: Tablero,
+        alpha: float = 0.5,
+        epsilon: float = 0.65,
+        gamma: float = 0.9,
+        tabla_densa: bool = False,
+        semilla=None,
+    ):
 
         # Ambiente para el agente
         self.tablero = tablero
@@ -14,94 +76,404 @@ class AgenteQLearning:
         self.gamma = gamma  # Factor de descuento
         self.epsilon = epsilon  # Ratio de exploración
         self.pos = 1 # Inicialización de la posición
-        # Mapa estado-acciones
-        self.s_acciones = {}
-        for s in self.tablero.espacio_estados:
-            # Al caer en una escalera o rodadero, hay una única acción automática
-            if self.tablero.escaleras_y_rodaderos.get(s, False):
-                self.s_acciones[s] = ["auto"]
-            # No hay acción en celdas terminales
-            elif s == tablero.celdas_victoria or s in tablero.celdas_perdida:
-                self.s_acciones[s] = [None]
-            # Todas las otras celdas tienen dos posibles acciones
-            else:
-                self.s_acciones[s] = [-1, 1]
+
+        # Generador propio del agente: con la misma semilla, el entrenamiento es reproducible
+        # (también en procesos paralelos). Los números uniformes se generan por bloques
+        self.rng = np.random.default_rng(semilla)
+        self._bloque = []
+        self._i_bloque = 0
+        # Mapa estado-acciones (a partir de tablero.acciones_validas):
+        #   - Al caer en una escalera o rodadero, hay una única acción automática
+        #   - No hay acción en celdas terminales
+        #   - Todas las otras celdas tienen dos posibles acciones
+        listas = ([-1, 1], ["auto"], [None])
+        self.s_acciones = mapa_acciones(tablero, listas)
 
         # Q-table: (estado, acción) -> Q
+        #   - tabla_densa=False: diccionario de Python
+        #   - tabla_densa=True: array (celda_max, nro_acciones) con vista de diccionario
+        self.tabla_densa = tabla_densa
+        if tabla_densa:
+            # Columnas (índices de acción) válidas por estado
+            self.s_indices = mapa_acciones(tablero, tuple([INDICE_ACCION[a] for a in acciones] for acciones in listas))
+            # Las acciones de cada tipo ocupan columnas contiguas de ACCIONES: un slice por tipo basta
+            # para recortar la fila del estado
+            self.s_columnas = mapa_acciones(
+                tablero, tuple(slice(INDICE_ACCION[a[0]], INDICE_ACCION[a[-1]] + 1) for a in listas)
+            )
         self.Qtabla = {}
 
+    @property
+    def Qtabla(self):
+        return self._Qtabla
+
+    @Qtabla.setter
+    def Qtabla(self, tabla):
+        """
+        Permite asignar una Q-tabla (p.ej. cargada con cargar_Qtabla) en cualquiera de los dos modos
+        """
+        if self.tabla_densa and not isinstance(tabla, QTablaDensa):
+            densa = QTablaDensa(self.tablero.acciones_validas[1:])
+            densa.update(tabla)
+            tabla = densa
+        elif not self.tabla_densa and not isinstance(tabla, dict):
+            tabla = dict(tabla)
+        self._Qtabla = tabla
+
+    def Q_estado(self, estado) -> list:
+        """
+        Q-valores (0 en caso aún no existan) de las acciones válidas del estado,
+        en el mismo orden que self.s_acciones[estado]
+        """
+        if self.tabla_densa:
+            # Una sola lectura de la fila, sin búsquedas por acción
+            return self._Qtabla.Q[estado - 1].tolist()[self.s_columnas[estado]]
+        return [self._Qtabla.get((estado, a), 0) for a in self.s_acciones[estado]]
+
+    def _uniforme(self) -> float:
+        """
+        Siguiente número uniforme en [0, 1) del bloque pre-generado
+        """
+        if self._i_bloque == len(self._bloque):
+            self._bloque = self.rng.random(TAM_BLOQUE_RNG).tolist()
+            self._i_bloque = 0
+        u = self._bloque[self._i_bloque]
+        self._i_bloque += 1
+        return u
+
+    def estado_rng(self) -> str:
+        """
+        Estado del generador (JSON), incluyendo los números del bloque aún no usados
+        """
+        return json.dumps({
+            "bit_generator": self.rng.bit_generator.state,
+            "bloque": self._bloque[self._i_bloque:],
+        })
+
+    def restaurar_rng(self, estado: str) -> None:
+        estado = json.loads(estado)
+        self.rng.bit_generator.state = estado["bit_generator"]
+        self._bloque = estado["bloque"]
+        self._i_bloque = 0
+
+    def reiniciar_episodio(self) -> None:
+        """
+        Llamado por run() al inicio de cada episodio (Q-learning no guarda estado entre pasos)
+        """
+
+    def estado_extra(self) -> Dict[str, np.ndarray]:
+        """
+        Arrays del agente, además de la Q-tabla, necesarios para reanudar desde un checkpoint
+        """
+        return {}
+
+    def restaurar_estado_extra(self, arrays: Dict[str, np.ndarray]) -> None:
+        pass
+
     def escoger_accion(self, estado) -> int:
         """
         Escoge una acción válida para el estado actual con el método epsilon-greedy
         """
         acciones_set = self.s_acciones[estado]
+        # Acción única (escalera/rodadero o celda terminal)
+        if len(acciones_set) == 1:
+            return acciones_set[0]
 
         # Exploración
-        if random.random() < self.epsilon:
-            return random.choice(acciones_set)
+        if self._uniforme() < self.epsilon:
+            return acciones_set[int(self._uniforme() * len(acciones_set))]
+
+        # Explotación sobre la tabla densa: con más de una acción, la celda es normal (dos acciones)
+        # y basta comparar sus dos Q-valores (mismo resultado y mismos números aleatorios que abajo)
+        elif self.tabla_densa:
+            item, i = self._Qtabla.Q.item, estado - 1
+            j_a, j_b = self.s_indices[estado]
+            Q_a, Q_b = item(i, j_a), item(i, j_b)
+            if Q_a != Q_b:
+                return acciones_set[Q_b > Q_a]
+            return acciones_set[int(self._uniforme() * 2)]
 
         # Explotación
         else:
             # Obtener los mejores valores Q (0 en caso aún no exista)
             # Usar 0 por defecto hace que el agente prefiera explorar
-            Q_vals = [self.Qtabla.get((estado, a), 0) for a in acciones_set]
+            Q_vals = self.Q_estado(estado)
             Q_max = max(Q_vals)
 
             # En caso de empate, escoger aleatoriamente una acción
             mejores_acciones = [a for a, Q in zip(acciones_set, Q_vals) if Q == Q_max]
-            return random.choice(mejores_acciones)
+            if len(mejores_acciones) == 1:
+                return mejores_acciones[0]
+            return mejores_acciones[int(self._uniforme() * len(mejores_acciones))]
 
     def actualizar_Q(self, estado, accion, reward, estado_siguiente) -> None:
         """
         Actualización Q-learning con base en la tupla (Sₜ,Aₜ,Rₜ,Sₜ₊₁):
             Q(Sₜ,Aₜ) = Q(Sₜ,Aₜ) + α[Rₜ₊₁ + γ*maxₐ Q(Sₜ₊₁,a) - Q(Sₜ,Aₜ)]    (Sutton & Barto, p. 131)
         """
-        # Q actual y mejor Q en el siguiente estado
-        Q_actual = self.Qtabla.get((estado, accion), 0.0)
-        Q_siguiente_max = max([self.Qtabla.get((estado_siguiente, a), 0.0) for a in self.s_acciones[estado_siguiente]])
+        # Actualización sobre el array (tabla densa), con lecturas escalares Q.item de una o dos columnas
+        if self.tabla_densa:
+            tabla = self._Qtabla
+            Q = tabla.Q
+            item, k = Q.item, estado_siguiente - 1
+            columnas = self.s_indices[estado_siguiente]
+            if len(columnas) == 1:
+                Q_siguiente_max = item(k, columnas[0])
+            else:
+                Q_siguiente_max = max(item(k, columnas[0]), item(k, columnas[1]))
+            i, j = estado - 1, INDICE_ACCION[accion]
+            Q_actual = item(i, j)
+            Q[i, j] = Q_actual + self.alpha * (reward + self.gamma * Q_siguiente_max - Q_actual)
+            tabla.visitado[i, j] = True
+            return
 
-        # Actualización
+        # Mejor Q en el siguiente estado
+        Q_siguiente_max = max(self.Q_estado(estado_siguiente))
+
+        # Actualización sobre el diccionario
+        Q_actual = self.Qtabla.get((estado, accion), 0.0)
         self.Qtabla[(estado, accion)] = Q_actual + self.alpha * (reward + self.gamma * Q_siguiente_max - Q_actual)
 
     def max_Q_values(self):
         """
         Calcular el Q-valor máximo de todos los estados en la Q-table
         """
+        if self.tabla_densa:
+            tabla = self._Qtabla
+            estados = np.flatnonzero(tabla.visitado.any(axis=1))
+            Q_max = np.where(tabla.validas[estados], tabla.Q[estados], -np.inf).max(axis=1)
+            return dict(zip((estados + 1).tolist(), Q_max.tolist()))
+
         estados = {s for (s, _) in self.Qtabla.keys()}
         return {
             s: max(self.Qtabla.get((s, a), 0) for a in self.s_acciones[s])
             for s in estados
         }
 
+    def max_Q_estados(self, estados) -> np.ndarray:
+        """
+        Calcular el Q-valor máximo solo para los estados indicados
+        """
+        if self.tabla_densa:
+            filas = np.asarray(estados) - 1
+            tabla = self._Qtabla
+            return np.where(tabla.validas[filas], tabla.Q[filas], -np.inf).max(axis=1)
+        return np.array([max(self.Q_estado(s)) for s in estados], dtype=float)
+
     def obtener_Qmax_politica(self):
-        filas, columnas = self.tablero.nro_filas, self.tablero.nro_columnas
-        Qmax = np.full((filas, columnas), np.nan)
-        politica_optima = np.full((filas, columnas), " ")
-        auto_char = 'X'
-        acciones_str_impar = {-1: '←', 1: '→', 'auto': auto_char}
-        acciones_str_par = {-1: '→', 1: '←', 'auto': auto_char}
-
-        # Iterar sobre todos los estados visitados
-        estados = {s for (s, _) in self.Qtabla.keys()}
-        for s in estados:
-            # Índices
-            x_int, y_int = self.tablero.celda_a_coord(s, centrar=False)
-            i, j = x_int - 1, y_int - 1
+        # Mejores acción y q en cada estado visitado
+        if self.tabla_densa:
+            tabla = self._Qtabla
+            estados = np.flatnonzero(tabla.visitado.any(axis=1))
+            qvals = np.where(tabla.validas[estados], tabla.Q[estados], -np.inf)
+            mejor_a = qvals.argmax(axis=1)  # Empates: primera acción, igual que max() sobre el diccionario
+            mejor_q = qvals[np.arange(len(estados)), mejor_a]
+            return grilla_Qmax_politica(self.tablero, estados + 1, mejor_q, mejor_a)
 
-            # Mejores acción y q en s
+        estados = sorted({s for (s, _) in self.Qtabla.keys()})
+        mejor_q, mejor_a = [], []
+        for s in estados:
             qvals = {a: self.Qtabla.get((s, a), 0.0) for a in self.s_acciones[s]}
-            mejor_a = max(qvals, key=qvals.get) # Equivalente a: argmaxₐ qvals[a]
-            mejor_q = self.Qtabla.get((s, mejor_a), 0.0)
+            a = max(qvals, key=qvals.get) # Equivalente a: argmaxₐ qvals[a]
+            mejor_q.append(qvals[a])
+            mejor_a.append(INDICE_ACCION[a])
+        return grilla_Qmax_politica(self.tablero, estados, mejor_q, mejor_a)
 
-            # Poblar arrays
-            Qmax[i, j] = np.round(mejor_q, decimals=1)
 
-            if y_int % 2 == 1:
-                politica_optima[i, j] = acciones_str_impar[mejor_a]
-            else:
-                politica_optima[i, j] = acciones_str_par[mejor_a]
+# Caracteres de la política por paridad de la fila (desde 1) y por índice de acción (ver ACCIONES)
+CARACTERES_POLITICA = np.array([
+    ['→', '←', 'X', ' '],  # Filas pares (de derecha a izquierda)
+    ['←', '→', 'X', ' '],  # Filas impares (de izquierda a derecha)
+])
+
+
+def grilla_Qmax_politica(tablero: Tablero, estados, mejor_q, mejor_a) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Construye las grillas (ya rotadas para mostrarse) del Q-valor máximo y de la política
+    a partir de arrays alineados: estados, mejor_q y mejor_a (índices de acción, ver INDICE_ACCION).
+    Los estados ausentes quedan como numpy.nan y ' ' respectivamente.
+    """
+    filas, columnas = tablero.nro_filas, tablero.nro_columnas
+    Qmax = np.full((columnas, filas), np.nan)
+    politica_optima = np.full((columnas, filas), " ")
+
+    # Índices de cada estado en la grilla (columna, fila) y asignación en una sola operación
+    estados = np.asarray(estados, dtype=np.int64)
+    i, j = tablero.columna_celda[estados], tablero.fila_celda[estados]
+    Qmax[i, j] = np.round(mejor_q, decimals=1)
+    politica_optima[i, j] = CARACTERES_POLITICA[(j + 1) % 2, np.asarray(mejor_a, dtype=np.int64)]
+
+    # Rotación para mostrar adecuadamente
+    Qmax = np.rot90(Qmax)
+    politica_optima = np.rot90(politica_optima)
+    return Qmax, politica_optima
+
+
+# Otros agentes tabulares -----------------------------------------------------------------
+class AgenteSARSA(AgenteQLearning):
+    """
+    SARSA (on-policy): la acción siguiente Aₜ₊₁ se escoge con epsilon-greedy al actualizar y se
+    usa en el siguiente paso:
+        Q(Sₜ,Aₜ) = Q(Sₜ,Aₜ) + α[Rₜ₊₁ + γ*Q(Sₜ₊₁,Aₜ₊₁) - Q(Sₜ,Aₜ)]    (Sutton & Barto, p. 130)
+    """
+
+    def __init__(self, tablero: Tablero, alpha=0.5, epsilon=0.65, gamma=0.9, tabla_densa=True, semilla=None):
+        super().__init__(tablero, alpha, epsilon, gamma, tabla_densa, semilla)
+        self._siguiente = None  # (estado, acción) ya escogida para el próximo paso
 
-        # Rotación para mostrar adecuadamente
-        Qmax = np.rot90(Qmax)
-        politica_optima = np.rot90(politica_optima)
-        return Qmax, politica_optima
+    def reiniciar_episodio(self) -> None:
+        self._siguiente = None
+
+    def escoger_accion(self, estado):
+        siguiente = self._siguiente
+        if siguiente is not None and siguiente[0] == estado:
+            self._siguiente = None
+            return siguiente[1]
+        return super().escoger_accion(estado)
+
+    def _Q(self, estado, accion) -> float:
+        if self.tabla_densa:
+            return self._Qtabla.Q.item(estado - 1, INDICE_ACCION[accion])
+        return self._Qtabla.get((estado, accion), 0.0)
+
+    def _actualizar(self, estado, accion, objetivo) -> None:
+        """
+        Q(Sₜ,Aₜ) = Q(Sₜ,Aₜ) + α[objetivo - Q(Sₜ,Aₜ)]
+        """
+        if self.tabla_densa:
+            i, j = estado - 1, INDICE_ACCION[accion]
+            Q_actual = self._Qtabla.Q.item(i, j)
+            self._Qtabla.Q[i, j] = Q_actual + self.alpha * (objetivo - Q_actual)
+            self._Qtabla.visitado[i, j] = True
+            return
+        Q_actual = self._Qtabla.get((estado, accion), 0.0)
+        self._Qtabla[(estado, accion)] = Q_actual + self.alpha * (objetivo - Q_actual)
+
+    def actualizar_Q(self, estado, accion, reward, estado_siguiente) -> None:
+        accion_siguiente = super().escoger_accion(estado_siguiente)
+        self._siguiente = (estado_siguiente, accion_siguiente)
+        self._actualizar(estado, accion, reward + self.gamma * self._Q(estado_siguiente, accion_siguiente))
+
+
+class AgenteExpectedSARSA(AgenteSARSA):
+    """
+    Expected SARSA: usa el valor esperado de Q(Sₜ₊₁,·) bajo la política epsilon-greedy
+        Q(Sₜ,Aₜ) = Q(Sₜ,Aₜ) + α[Rₜ₊₁ + γ*Σₐ π(a|Sₜ₊₁)Q(Sₜ₊₁,a) - Q(Sₜ,Aₜ)]    (Sutton & Barto, p. 133)
+    Con epsilon-greedy: Σₐ π(a|s)Q(s,a) = (1 - ε)*maxₐ Q(s,a) + ε*media(Q(s,·)). La acción siguiente
+    no se fija de antemano.
+    """
+
+    def actualizar_Q(self, estado, accion, reward, estado_siguiente) -> None:
+        Q_vals = self.Q_estado(estado_siguiente)
+        if len(Q_vals) == 1:
+            esperado = Q_vals[0]
+        else:
+            esperado = (1 - self.epsilon) * max(Q_vals) + self.epsilon * sum(Q_vals) / len(Q_vals)
+        self._actualizar(estado, accion, reward + self.gamma * esperado)
+
+
+class AgenteDobleQ(AgenteQLearning):
+    """
+    Double Q-learning (Sutton & Barto, p. 136): dos tablas Q_A y Q_B; en cada paso se actualiza una
+    de ellas (al azar), con la acción greedy según ella misma y el valor según la otra:
+        Q_A(Sₜ,Aₜ) = Q_A(Sₜ,Aₜ) + α[Rₜ₊₁ + γ*Q_B(Sₜ₊₁, argmaxₐ Q_A(Sₜ₊₁,a)) - Q_A(Sₜ,Aₜ)]
+    La Q-tabla del agente (usada para escoger acciones, snapshots, checkpoints y evaluación) guarda
+    la media (Q_A + Q_B) / 2; solo se almacena Q_A aparte (Q_B = 2*Q - Q_A). Requiere tabla densa.
+    """
+
+    def __init__(self, tablero: Tablero, alpha=0.5, epsilon=0.65, gamma=0.9, tabla_densa=True, semilla=None):
+        if not tabla_densa:
+            raise ValueError(f"{type(self).__name__} requiere tabla_densa=True")
+        super().__init__(tablero, alpha, epsilon, gamma, tabla_densa, semilla)
+
+    @property
+    def Qtabla(self):
+        return self._Qtabla
+
+    @Qtabla.setter
+    def Qtabla(self, tabla):
+        # Al asignar una Q-tabla externa, ambas tablas parten de ella
+        AgenteQLearning.Qtabla.fset(self, tabla)
+        self.Q_A = np.array(self._Qtabla.Q, dtype=np.float64)
+
+    def estado_extra(self) -> Dict[str, np.ndarray]:
+        return {"Q_A": self.Q_A}
+
+    def restaurar_estado_extra(self, arrays: Dict[str, np.ndarray]) -> None:
+        self.Q_A = np.array(arrays["Q_A"], dtype=np.float64)
+
+    def actualizar_Q(self, estado, accion, reward, estado_siguiente) -> None:
+        Q, Q_A = self._Qtabla.Q, self.Q_A
+        i, j = estado - 1, INDICE_ACCION[accion]
+        k = estado_siguiente - 1
+        indices = self.s_indices[estado_siguiente]
+        fila_A = Q_A[k].tolist()
+        fila_B = (2 * Q[k] - Q_A[k]).tolist()
+
+        if self._uniforme() < 0.5:
+            # Actualizar Q_A: acción greedy según Q_A, valor según Q_B
+            mejor = max(indices, key=fila_A.__getitem__)
+            actual = Q_A.item(i, j)
+            delta = self.alpha * (reward + self.gamma * fila_B[mejor] - actual)
+            Q_A[i, j] = actual + delta
+        else:
+            # Actualizar Q_B: acción greedy según Q_B, valor según Q_A
+            mejor = max(indices, key=fila_B.__getitem__)
+            actual = 2 * Q.item(i, j) - Q_A.item(i, j)
+            delta = self.alpha * (reward + self.gamma * fila_A[mejor] - actual)
+        # La media cambia en la mitad de la actualización de cualquiera de las dos tablas
+        Q[i, j] += delta / 2
+        self._Qtabla.visitado[i, j] = True
+
+
+class AgenteQLambda(AgenteSARSA):
+    """
+    Q(λ) de Watkins con trazas de elegibilidad reemplazantes (Sutton & Barto, sección 12.10):
+        δ = Rₜ₊₁ + γ*maxₐ Q(Sₜ₊₁,a) - Q(Sₜ,Aₜ);  e(Sₜ,Aₜ) = 1;  Q += α*δ*e
+    Si la acción siguiente (escogida al actualizar, como en SARSA) es greedy las trazas decaen en γλ;
+    si es exploratoria se cortan. Así el reward terminal recorre toda la trayectoria reciente en un
+    solo paso. Las trazas se guardan de forma dispersa (solo los pares con traza mayor a
+    'umbral_traza') y se reinician en cada episodio. Requiere tabla densa.
+    """
+
+    def __init__(
+        self, tablero: Tablero, alpha=0.5, epsilon=0.65, gamma=0.9, tabla_densa=True, semilla=None,
+        lambd: float = 0.9, umbral_traza: float = 1e-3,
+    ):
+        if not tabla_densa:
+            raise ValueError(f"{type(self).__name__} requiere tabla_densa=True")
+        super().__init__(tablero, alpha, epsilon, gamma, tabla_densa, semilla)
+        self.lambd = lambd
+        self.umbral_traza = umbral_traza
+        self.trazas = {}  # Índice plano (fila * nro_acciones + columna) -> traza
+
+    def reiniciar_episodio(self) -> None:
+        super().reiniciar_episodio()
+        self.trazas.clear()
+
+    def actualizar_Q(self, estado, accion, reward, estado_siguiente) -> None:
+        tabla = self._Qtabla
+        Q = tabla.Q.reshape(-1)
+        nro_acciones = tabla.Q.shape[1]
+        i = (estado - 1) * nro_acciones + INDICE_ACCION[accion]
+
+        # Acción siguiente (se usa en el próximo paso) y si es greedy
+        Q_siguiente = self.Q_estado(estado_siguiente)
+        Q_siguiente_max = max(Q_siguiente)
+        accion_siguiente = AgenteQLearning.escoger_accion(self, estado_siguiente)
+        self._siguiente = (estado_siguiente, accion_siguiente)
+        greedy = Q_siguiente[self.s_acciones[estado_siguiente].index(accion_siguiente)] == Q_siguiente_max
+
+        delta = reward + self.gamma * Q_siguiente_max - Q.item(i)
+        trazas = self.trazas
+        trazas[i] = 1.0
+        paso = self.alpha * delta
+        for k, e in trazas.items():
+            Q[k] += paso * e
+        tabla.visitado.reshape(-1)[i] = True
+
+        if greedy:
+            decaimiento = self.gamma * self.lambd
+            self.trazas = {k: e * decaimiento for k, e in trazas.items() if e * decaimiento > self.umbral_traza}
+        else:
+            trazas.clear()
@@ -0,0 +1,188 @@
+from typing import List, Dict
+from concurrent.futures import ProcessPoolExecutor
+import itertools
+import argparse
+import time
+import csv
+import numpy as np
+from tablero import Tablero
+from agente import AgenteQLearning
+from simulacion import run
+from registro import Registro, SILENCIO
+from evaluacion import evaluar_politica, evaluar_politica_esperada, RESULTADOS, VICTORIA, PERDIDA, CICLO
+
+# Hiperparámetros que se pueden barrer
+PARAMETROS = ("alpha", "epsilon", "gamma", "epsilon_ciclos")
+VALORES_DEFECTO = {"alpha": 0.5, "epsilon": 0.5, "gamma": 1.0, "epsilon_ciclos": 5}
+
+
+def espacio_grilla(**valores) -> List[Dict]:
+    """
+    Producto cartesiano de los valores dados para cada hiperparámetro, p.ej.:
+        espacio_grilla(alpha=[0.1, 0.5], epsilon=[0.5, 0.75])
+    Los hiperparámetros no indicados toman el valor de VALORES_DEFECTO
+    """
+    nombres = [p for p in PARAMETROS if p in valores]
+    return [
+        {**VALORES_DEFECTO, **dict(zip(nombres, combinacion))}
+        for combinacion in itertools.product(*(valores[p] for p in nombres))
+    ]
+
+
+def espacio_aleatorio(n: int, semilla=None, **rangos) -> List[Dict]:
+    """
+    Búsqueda aleatoria: n configuraciones con cada hiperparámetro muestreado de forma uniforme
+    en su rango (min, max), p.ej.: espacio_aleatorio(20, alpha=(0.05, 0.9), epsilon=(0.1, 1))
+    'epsilon_ciclos' se muestrea como entero
+    """
+    rng = np.random.default_rng(semilla)
+    configuraciones = []
+    for _ in range(n):
+        config = dict(VALORES_DEFECTO)
+        for p, (minimo, maximo) in rangos.items():
+            if p == "epsilon_ciclos":
+                config[p] = int(rng.integers(minimo, maximo + 1))
+            else:
+                config[p] = float(rng.uniform(minimo, maximo))
+        configuraciones.append(config)
+    return configuraciones
+
+
+# Funciones del worker --------------------------------------------------------------------
+# El tablero se envía (pickle) una sola vez por proceso mediante el initializer del pool
+_TABLERO = None
+
+
+def _inicializar_worker(tablero: Tablero) -> None:
+    global _TABLERO
+    _TABLERO = tablero
+
+
+def _correr_configuracion(tarea) -> Dict:
+    config, semilla, episodios = tarea
+    if _TABLERO.estocastico:
+        # Dados reproducibles por ejecución (independientes del orden en que el worker recibe las tareas)
+        _TABLERO.sembrar(semilla)
+    agente = AgenteQLearning(
+        _TABLERO, alpha=config["alpha"], epsilon=config["epsilon"], gamma=config["gamma"],
+        tabla_densa=True, semilla=semilla
+    )
+    time_s = time.time()
+    resultados, _ = run(
+        _TABLERO, agente, episodios,
+        epsilon_ciclos=config["epsilon_ciclos"], registro=Registro(verbosidad=SILENCIO)
+    )
+    segundos = time.time() - time_s
+
+    # Resumen del entrenamiento y de la política greedy final
+    rewards = resultados.reward.astype(np.float64)
+    ultimos = rewards[-max(1, episodios // 10):]
+    # Política greedy desde la celda 1 (sin actualizar Q)
+    if _TABLERO.estocastico:
+        # Evaluación exacta en esperanza: pasos esperados y resultado más probable (ciclo si puede no terminar)
+        evaluacion = evaluar_politica_esperada(_TABLERO, agente.Qtabla, estados_iniciales=[1])
+        prob_victoria = float(evaluacion["prob_victoria"][0])
+        pasos_politica = float(evaluacion["pasos"][0])
+        if np.isnan(pasos_politica):
+            resultado = CICLO
+        else:
+            resultado = VICTORIA if prob_victoria >= float(evaluacion["prob_perdida"][0]) else PERDIDA
+    else:
+        # Recorrido greedy determinista
+        evaluacion = evaluar_politica(_TABLERO, agente.Qtabla, estados_iniciales=[1])
+        pasos_politica = int(evaluacion["pasos"][0])
+        resultado = int(evaluacion["resultado"][0])
+        prob_victoria = float(resultado == VICTORIA)
+    resultado_politica = RESULTADOS[resultado]
+    return {
+        **config,
+        "semilla": semilla,
+        "reward_medio": float(rewards.mean()),
+        "reward_final": float(ultimos.mean()),
+        "reward_max": float(rewards.max()),
+        "tasa_victoria": resultados.tasa_victoria(),
+        "pasos_politica": pasos_politica,
+        "resultado_politica": resultado_politica,
+        "prob_victoria_politica": prob_victoria,
+        "segundos": round(segundos, 4),
+    }
+
+
+# Barrido ---------------------------------------------------------------------------------
+def barrido(
+    tablero: Tablero,
+    configuraciones: List[Dict],
+    semillas=(0,),
+    episodios: int = 1000,
+    n_procesos=None,
+    path_csv=None,
+) -> List[Dict]:
+    """
+    Ejecuta run() para cada combinación (configuración, semilla) en un pool de procesos.
+    Retorna una tabla de resultados (lista de diccionarios, una fila por ejecución) y
+    opcionalmente la guarda como CSV.
+    """
+    tareas = [(config, semilla, episodios) for config in configuraciones for semilla in semillas]
+    print(f"Barrido: {len(configuraciones)} configuraciones x {len(semillas)} semillas = {len(tareas)} ejecuciones")
+
+    time_s = time.time()
+    with ProcessPoolExecutor(
+        max_workers=n_procesos, initializer=_inicializar_worker, initargs=(tablero,)
+    ) as pool:
+        resultados = list(pool.map(_correr_configuracion, tareas))
+    print(f"Barrido completado en {time.time() - time_s:.4f} segundos")
+
+    if path_csv is not None:
+        guardar_resultados(path_csv, resultados)
+    return resultados
+
+
+def guardar_resultados(path: str, resultados: List[Dict]) -> None:
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(resultados[0].keys()))
+        writer.writeheader()
+        writer.writerows(resultados)
+    print(f"Resultados guardados en {path}")
+
+
+if __name__ == "__main__":
+    from helpers import leer_tablero
+
+    parser = argparse.ArgumentParser(description="Barrido de hiperparámetros de Q-learning en paralelo")
+    parser.add_argument("--tablero", default="./tablero")
+    parser.add_argument("--nro_filas", type=int, default=10)
+    parser.add_argument("--nro_columnas", type=int, default=10)
+    parser.add_argument("--cache_tableros", default=None, help="carpeta para la caché de tableros leídos")
+    parser.add_argument("--episodios", type=int, default=1000)
+    parser.add_argument("--semillas", type=int, nargs="+", default=[0])
+    parser.add_argument("--procesos", type=int, default=None)
+    parser.add_argument("--salida", default="barrido.csv")
+    # Grilla: lista de valores por hiperparámetro
+    parser.add_argument("--alpha", type=float, nargs="+", default=[0.5])
+    parser.add_argument("--epsilon", type=float, nargs="+", default=[0.5])
+    parser.add_argument("--gamma", type=float, nargs="+", default=[1.0])
+    parser.add_argument("--epsilon_ciclos", type=int, nargs="+", default=[5])
+    # Búsqueda aleatoria: n configuraciones entre el mínimo y el máximo de cada lista anterior
+    parser.add_argument("--aleatorio", type=int, default=None)
+    parser.add_argument("--semilla_busqueda", type=int, default=None,
+                        help="semilla para muestrear las configuraciones de la búsqueda aleatoria")
+    args = parser.parse_args()
+
+    rodaderos, escaleras, perdida, victoria = leer_tablero(
+        args.tablero, args.nro_filas, args.nro_columnas, cache_dir=args.cache_tableros
+    )
+    tab = Tablero(
+        nro_filas=args.nro_filas, nro_columnas=args.nro_columnas,
+        celdas_victoria=victoria, celdas_perdida=perdida,
+        celdas_escalera=escaleras, celdas_rodadero=rodaderos,
+        r_victoria=100, r_perdida=-100, r_otros=-1
+    )
+    valores = {p: getattr(args, p) for p in PARAMETROS}
+    if args.aleatorio is None:
+        configuraciones = espacio_grilla(**valores)
+    else:
+        configuraciones = espacio_aleatorio(
+            args.aleatorio, semilla=args.semilla_busqueda, **{p: (min(v), max(v)) for p, v in valores.items()}
+        )
+
+    barrido(tab, configuraciones, args.semillas, args.episodios, args.procesos, args.salida)
@@ -0,0 +1,219 @@
+from typing import List, Dict, Callable
+import subprocess
+import sys
+import tempfile
+import platform
+import argparse
+import time
+import json
+import os
+import numpy as np
+from tablero import Tablero
+from agente import AgenteQLearning
+from simulacion import run
+from registro import Registro, SILENCIO
+from helpers import leer_tablero, guardar_Qtabla, cargar_Qtabla
+from generador import generar_tablero
+
+
+# Tableros --------------------------------------------------------------------------------
+def tablero_proyecto() -> Tablero:
+    rodaderos, escaleras, perdida, victoria = leer_tablero("./tablero")
+    return Tablero(10, 10, victoria, perdida, escaleras, rodaderos, r_victoria=100, r_perdida=-100, r_otros=-1)
+
+
+def tablero_main2() -> Tablero:
+    return Tablero(
+        nro_columnas=10, nro_filas=10,
+        celdas_victoria=[96], celdas_perdida=[14, 56, 85],
+        celdas_escalera=[(6, 26), (7, 70), (22, 58), (60, 80), (68, 93), (84, 100), (47, 65), (33, 51)],
+        celdas_rodadero=[(25, 20), (30, 13), (57, 36), (73, 61)],
+        r_victoria=100, r_perdida=-100, r_otros=-1
+    )
+
+
+def tablero_sintetico(n: int, semilla: int = 0) -> Tablero:
+    """
+    Tablero n x n con victoria en la última celda y ~5% de escaleras, ~5% de rodaderos y ~2% de pérdidas
+    """
+    return generar_tablero(n, n, semilla=semilla, r_victoria=100, r_perdida=-100, r_otros=-1)
+
+
+# Mediciones ------------------------------------------------------------------------------
+def medir(funcion: Callable, repeticiones: int) -> float:
+    """
+    Mejor tiempo (segundos) de 'repeticiones' ejecuciones de la función
+    """
+    tiempos = []
+    for _ in range(repeticiones):
+        t = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - t)
+    return min(tiempos)
+
+
+def benchmark_tablero(nombre: str, constructor: Callable, args) -> List[Dict]:
+    resultados = []
+
+    def agregar(metrica, valor, unidad):
+        resultados.append({"tablero": nombre, "metrica": metrica, "valor": valor, "unidad": unidad})
+        print(f"  {metrica:<28} {valor:>14.4f} {unidad}")
+
+    print(f"{nombre}")
+    t = time.perf_counter()
+    tablero = constructor()
+    agregar("construccion_tablero", time.perf_counter() - t, "s")
+    agregar("celdas", tablero.celda_max, "celdas")
+
+    # Pares (estado, acción) no terminales al azar para las llamadas individuales
+    rng = np.random.default_rng(0)
+    agente = AgenteQLearning(tablero, gamma=1, tabla_densa=True, semilla=0)
+    no_terminales = np.flatnonzero(~tablero.terminal[1:]) + 1
+    estados = rng.choice(no_terminales, args.llamadas).tolist()
+    acciones = [agente.s_acciones[s][int(rng.integers(len(agente.s_acciones[s])))] for s in estados]
+    siguientes = [tablero.transicion(s, a) for s, a in zip(estados, acciones)]
+    n = args.llamadas
+
+    agregar("transicion", 1e9 * medir(
+        lambda: [tablero.transicion(s, a) for s, a in zip(estados, acciones)], args.repeticiones) / n, "ns/llamada")
+    agregar("reward", 1e9 * medir(
+        lambda: [tablero.reward(s) for s in siguientes], args.repeticiones) / n, "ns/llamada")
+
+    for modo, densa in (("dict", False), ("densa", True)):
+        t = time.perf_counter()
+        agente = AgenteQLearning(tablero, alpha=0.5, epsilon=0.5, gamma=1, tabla_densa=densa, semilla=0)
+        agregar(f"construccion_agente_{modo}", time.perf_counter() - t, "s")
+        agregar(f"escoger_accion_{modo}", 1e9 * medir(
+            lambda: [agente.escoger_accion(s) for s in estados], args.repeticiones) / n, "ns/llamada")
+        agregar(f"actualizar_Q_{modo}", 1e9 * medir(
+            lambda: [agente.actualizar_Q(s, a, -1, s2) for s, a, s2 in zip(estados, acciones, siguientes)],
+            args.repeticiones) / n, "ns/llamada")
+
+        # Entrenamiento completo (solo en tableros donde los episodios terminan en tiempo razonable)
+        if tablero.celda_max <= args.max_celdas_run:
+            agente = AgenteQLearning(tablero, alpha=0.5, epsilon=0.5, gamma=1, tabla_densa=densa, semilla=0)
+            t = time.perf_counter()
+            resultados_run, _ = run(tablero, agente, args.episodios, registro=Registro(SILENCIO))
+            agregar(f"run_{modo}", args.episodios / (time.perf_counter() - t), "episodios/s")
+            agregar(f"historial_run_{modo}", resultados_run.nbytes / args.episodios, "bytes/episodio")
+
+        # Guardar y cargar la Q-tabla
+        with tempfile.TemporaryDirectory() as carpeta:
+            path = os.path.join(carpeta, "Qtabla.npz")
+            agregar(f"guardar_Qtabla_{modo}", medir(
+                lambda: guardar_Qtabla(path, agente.Qtabla, tablero), args.repeticiones), "s")
+            agregar(f"cargar_Qtabla_{modo}", medir(
+                lambda: cargar_Qtabla(path, tablero), args.repeticiones), "s")
+            if densa:
+                agregar("cargar_Qtabla_mmap", medir(
+                    lambda: cargar_Qtabla(path, tablero, mmap=True), args.repeticiones), "s")
+    return resultados
+
+
+# Presupuesto de tiempo de importación (ms, proceso nuevo) de los módulos que cargan los workers y
+# las evaluaciones por CLI. Ninguno debe cargar matplotlib (se importa solo al pedir gráficos)
+PRESUPUESTO_IMPORTACION_MS = {"tablero": 150, "agente": 150, "simulacion": 200}
+
+_CODIGO_IMPORTACION = """
+import importlib, json, sys, time
+t = time.perf_counter()
+importlib.import_module(sys.argv[1])
+segundos = time.perf_counter() - t
+print(json.dumps({"segundos": segundos, "matplotlib": "matplotlib" in sys.modules}))
+"""
+
+
+def medir_importacion(modulo: str, repeticiones: int) -> Dict:
+    """
+    Mejor tiempo de importación del módulo en un proceso nuevo (sin caché de módulos en memoria)
+    y si la importación cargó matplotlib
+    """
+    carpeta = os.path.dirname(os.path.abspath(__file__))
+    mediciones = []
+    for _ in range(repeticiones):
+        salida = subprocess.run(
+            [sys.executable, "-c", _CODIGO_IMPORTACION, modulo],
+            capture_output=True, text=True, check=True, cwd=carpeta,
+        ).stdout
+        mediciones.append(json.loads(salida))
+    return {
+        "ms": 1000 * min(m["segundos"] for m in mediciones),
+        "matplotlib": any(m["matplotlib"] for m in mediciones),
+    }
+
+
+def benchmark_importacion(args) -> List[Dict]:
+    resultados = []
+    print("importacion")
+    for modulo, presupuesto in PRESUPUESTO_IMPORTACION_MS.items():
+        medicion = medir_importacion(modulo, args.repeticiones)
+        dentro = medicion["ms"] <= presupuesto and not medicion["matplotlib"]
+        resultados.append({
+            "tablero": "importacion", "metrica": f"importar_{modulo}", "valor": medicion["ms"], "unidad": "ms",
+            "presupuesto": presupuesto, "matplotlib": medicion["matplotlib"], "dentro_presupuesto": dentro,
+        })
+        print(f"  importar_{modulo:<19} {medicion['ms']:>14.4f} ms (presupuesto {presupuesto} ms"
+              f"{', carga matplotlib' if medicion['matplotlib'] else ''}) {'✅' if dentro else '❌'}")
+    return resultados
+
+
+def _commit_actual() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def comparar(actuales: List[Dict], path_referencia: str) -> None:
+    """
+    Imprime la razón actual/referencia de cada métrica común con otro archivo de resultados
+    """
+    with open(path_referencia) as f:
+        referencia = {(r["tablero"], r["metrica"]): r for r in json.load(f)["resultados"]}
+    print(f"\nComparación con {path_referencia} (actual / referencia):")
+    for r in actuales:
+        ref = referencia.get((r["tablero"], r["metrica"]))
+        if ref is not None and ref["valor"]:
+            print(f"  {r['tablero']:<14} {r['metrica']:<28} {r['valor'] / ref['valor']:>8.3f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark del ciclo de entrenamiento")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[10, 100, 1000],
+                        help="lados n de los tableros sintéticos n x n")
+    parser.add_argument("--episodios", type=int, default=500)
+    parser.add_argument("--llamadas", type=int, default=100_000)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--max_celdas_run", type=int, default=10_000)
+    parser.add_argument("--salida", default="benchmark.json")
+    parser.add_argument("--comparar", default=None, help="archivo de resultados de referencia")
+    parser.add_argument("--solo_importacion", action="store_true",
+                        help="medir solo los tiempos de importación; termina con código 1 si exceden el presupuesto")
+    args = parser.parse_args()
+
+    resultados = benchmark_importacion(args)
+    if args.solo_importacion:
+        sys.exit(0 if all(r["dentro_presupuesto"] for r in resultados) else 1)
+
+    tableros = {"tablero": tablero_proyecto, "main2": tablero_main2}
+    for n in args.tamanos:
+        tableros[f"sintetico_{n}x{n}"] = lambda n=n: tablero_sintetico(n)
+
+    for nombre, constructor in tableros.items():
+        resultados += benchmark_tablero(nombre, constructor, args)
+
+    with open(args.salida, "w") as f:
+        json.dump({
+            "commit": _commit_actual(),
+            "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "parametros": vars(args),
+            "resultados": resultados,
+        }, f, indent=2)
+    print(f"Resultados guardados en {args.salida}")
+
+    if args.comparar is not None:
+        comparar(resultados, args.comparar)
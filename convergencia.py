@@ -0,0 +1,111 @@
+from typing import Dict
+import numpy as np
+from tablero import Tablero
+from qtabla import QTablaDensa
+from evaluacion import politica_greedy
+
+
+class CriterioConvergencia:
+    """
+    Criterio de parada temprana para simulacion.run (opt-in: run(..., convergencia=CriterioConvergencia(...))).
+    Se verifica cada 'cada' episodios (desde 'min_episodios') y el entrenamiento se detiene cuando se
+    cumple cualquiera de los criterios activos:
+        - politica_estable=M: la política greedy no cambió en M verificaciones consecutivas
+        - tol_Q: max |ΔQ| entre dos verificaciones consecutivas es menor a tol_Q
+        - ventana_reward=v: la media del reward de los últimos v episodios difiere de la de los
+          v anteriores en menos de tol_reward (meseta)
+    Al detenerse, 'episodio' y 'motivo' indican cuándo y por qué. El estado del criterio se guarda en los
+    checkpoints de run() (estado / restaurar): al reanudar un entrenamiento que ya se detuvo, no se
+    corren más episodios.
+    """
+
+    def __init__(
+        self, cada: int = 100, politica_estable: int = None, tol_Q: float = None,
+        ventana_reward: int = None, tol_reward: float = 0.5, min_episodios: int = 0,
+    ):
+        if politica_estable is None and tol_Q is None and ventana_reward is None:
+            raise ValueError("Indicar al menos un criterio: politica_estable, tol_Q o ventana_reward")
+        self.cada = cada
+        self.politica_estable = politica_estable
+        self.tol_Q = tol_Q
+        self.ventana_reward = ventana_reward
+        self.tol_reward = tol_reward
+        self.min_episodios = min_episodios
+
+        self.episodio = None
+        self.motivo = None
+        self._politica = None
+        self._Q = None
+        self._sin_cambios = 0
+
+    def verificar(self, episodio: int, tablero: Tablero, agente, reward_historico: np.ndarray) -> bool:
+        """
+        Retorna True si el entrenamiento debe detenerse después de 'episodio'.
+        'reward_historico': reward de los episodios corridos (ResultadosRun.reward)
+        """
+        if episodio % self.cada or episodio < self.min_episodios:
+            return False
+
+        motivo = None
+        if self.politica_estable is not None or self.tol_Q is not None:
+            Q = self._Q_array(tablero, agente.Qtabla)
+
+            if self.politica_estable is not None:
+                politica = politica_greedy(tablero, Q)
+                if self._politica is not None and np.array_equal(politica, self._politica):
+                    self._sin_cambios += 1
+                else:
+                    self._sin_cambios = 0
+                self._politica = politica
+                if self._sin_cambios >= self.politica_estable:
+                    motivo = f"política greedy sin cambios en {self._sin_cambios} verificaciones"
+
+            if self.tol_Q is not None:
+                if self._Q is not None:
+                    delta = float(np.abs(Q - self._Q).max())
+                    if motivo is None and delta < self.tol_Q:
+                        motivo = f"max |ΔQ| = {delta:.3g} < {self.tol_Q}"
+                self._Q = np.array(Q, copy=True)
+
+        v = self.ventana_reward
+        if motivo is None and v is not None and len(reward_historico) >= 2 * v:
+            actual = np.mean(reward_historico[-v:])
+            anterior = np.mean(reward_historico[-2 * v:-v])
+            if abs(actual - anterior) < self.tol_reward:
+                motivo = f"meseta de reward: media {actual:.2f} vs {anterior:.2f} (últimos {v} episodios)"
+
+        if motivo is not None:
+            self.episodio, self.motivo = episodio, motivo
+            return True
+        return False
+
+    # Checkpoints ------------------------------------------------------------------------
+    def estado(self) -> Dict[str, np.ndarray]:
+        """
+        Arrays con el estado del criterio (parada ya ocurrida y ventanas entre verificaciones)
+        """
+        arrays = {
+            "contadores": np.array([self._sin_cambios, -1 if self.episodio is None else self.episodio]),
+            "motivo": np.array("" if self.motivo is None else self.motivo),
+        }
+        if self._politica is not None:
+            arrays["politica"] = self._politica
+        if self._Q is not None:
+            arrays["Q"] = self._Q
+        return arrays
+
+    def restaurar(self, arrays: Dict[str, np.ndarray]) -> None:
+        sin_cambios, episodio = (int(c) for c in arrays["contadores"])
+        self._sin_cambios = sin_cambios
+        self.episodio = None if episodio < 0 else episodio
+        self.motivo = str(arrays["motivo"]) or None
+        self._politica = np.array(arrays["politica"]) if "politica" in arrays else None
+        self._Q = np.array(arrays["Q"]) if "Q" in arrays else None
+
+    @staticmethod
+    def _Q_array(tablero: Tablero, Qtabla) -> np.ndarray:
+        if isinstance(Qtabla, QTablaDensa):
+            return Qtabla.Q
+        densa = QTablaDensa(tablero.acciones_validas[1:])
+        densa.update(Qtabla)
+        return densa.Q
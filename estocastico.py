@@ -0,0 +1,246 @@
+from typing import Tuple, List, Sequence
+import hashlib
+import json
+import numpy as np
+from tablero import Tablero, ACCIONES, INDICE_ACCION, DESPLAZAMIENTOS
+
+# Cantidad de números aleatorios que el tablero genera por bloque (mismo criterio que el agente)
+TAM_BLOQUE_RNG = 4096
+# Dado de 6 caras equiprobables
+DADO_6 = (1 / 6,) * 6
+
+
+def construir_P(tablero: Tablero, probabilidades_dado: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Matriz de transición P[s, a, s'] en formato CSR (sin scipy). La fila 's * nro_acciones + a'
+    contiene las celdas s' alcanzables al tomar la acción a en s y su probabilidad:
+        - -1 / 1: se lanza el dado y se avanza/retrocede d celdas con probabilidad probabilidades_dado[d - 1],
+          dentro de los límites del tablero (los movimientos que se salen se acumulan en la celda límite)
+        - "auto": final de la escalera/rodadero con probabilidad 1
+        - None y acciones no válidas: fila vacía
+    Las columnas de cada fila están ordenadas y sin repetir.
+    Retorna (indptr, indices, data)
+    """
+    nro_acciones = len(ACCIONES)
+    n_filas = (tablero.celda_max + 1) * nro_acciones
+    caras = np.flatnonzero(probabilidades_dado > 0)
+
+    # Pares (estado, acción) con movimiento de dado y su fila en la matriz
+    estados, acciones = np.nonzero(tablero.acciones_validas & (DESPLAZAMIENTOS != 0)[None, :])
+    destinos = np.clip(
+        estados[:, None] + DESPLAZAMIENTOS[acciones][:, None] * (caras + 1)[None, :], 1, tablero.celda_max
+    )
+    filas = np.repeat(estados * nro_acciones + acciones, len(caras))
+    columnas = destinos.ravel()
+    probabilidades = np.tile(probabilidades_dado[caras], len(estados))
+
+    # Escaleras y rodaderos: movimiento determinista
+    inicios = np.flatnonzero(tablero.acciones_validas[:, INDICE_ACCION["auto"]])
+    filas = np.concatenate([filas, inicios * nro_acciones + INDICE_ACCION["auto"]])
+    columnas = np.concatenate([columnas, tablero.destino[inicios]])
+    probabilidades = np.concatenate([probabilidades, np.ones(len(inicios))])
+
+    # Ordenar por (fila, columna) y sumar las entradas repetidas
+    claves, inverso = np.unique(filas * (tablero.celda_max + 1) + columnas, return_inverse=True)
+    data = np.bincount(inverso.ravel(), weights=probabilidades, minlength=len(claves))
+    filas, indices = np.divmod(claves, tablero.celda_max + 1)
+    indptr = np.zeros(n_filas + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum(np.bincount(filas, minlength=n_filas))
+    return indptr, indices, data
+
+
+def construir_alias(indptr: np.ndarray, data: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Tablas de alias (Walker/Vose) para todas las filas no vacías de una matriz CSR a la vez.
+    Cada fila se rellena hasta K = máximo de entradas por fila (las posiciones de relleno tienen
+    probabilidad 0 y siempre redirigen a su alias). Vose se ejecuta en paralelo sobre las filas:
+    en cada una de las K - 1 iteraciones cada fila cierra una posición 'pequeña' (q < 1) y
+    descuenta su masa faltante de una posición 'grande' (q >= 1).
+    Retorna (filas: índice de cada fila no vacía, prob: (filas, K), alias: (filas, K) posición dentro de la fila)
+    """
+    largos = np.diff(indptr)
+    filas = np.flatnonzero(largos)
+    K = int(largos.max()) if len(filas) else 1
+
+    # Probabilidades por fila en una matriz (filas, K) con relleno 0
+    fila_entrada = np.repeat(np.arange(len(filas)), largos[filas])
+    posicion = np.arange(len(data)) - np.repeat(indptr[filas], largos[filas])
+    q = np.zeros((len(filas), K))
+    q[fila_entrada, posicion] = data
+    q *= K / q.sum(axis=1, keepdims=True)
+
+    prob = np.ones((len(filas), K))
+    alias = np.tile(np.arange(K, dtype=np.int8 if K < 128 else np.int64), (len(filas), 1))
+    pendiente = np.ones((len(filas), K), dtype=bool)
+    for _ in range(K - 1):
+        pequenas = pendiente & (q < 1.0)
+        grandes = pendiente & (q >= 1.0)
+        activas = np.flatnonzero(pequenas.any(axis=1) & grandes.any(axis=1))
+        if len(activas) == 0:
+            break
+        i_peq = pequenas[activas].argmax(axis=1)
+        i_gra = grandes[activas].argmax(axis=1)
+        prob[activas, i_peq] = q[activas, i_peq]
+        alias[activas, i_peq] = i_gra
+        q[activas, i_gra] -= 1.0 - q[activas, i_peq]
+        pendiente[activas, i_peq] = False
+    # Las posiciones que quedan pendientes tienen q ≈ 1 (prob = 1)
+    return filas, prob, alias
+
+
+class TableroEstocastico(Tablero):
+    """
+    Variante del tablero en la que las acciones -1 / 1 lanzan un dado: la dirección la elige el
+    agente y la cantidad de celdas d (1, 2, ...) se muestrea de 'probabilidades_dado'. Con un dado
+    de una sola cara (probabilidades_dado=(1,)) equivale a Tablero.
+
+    El modelo completo se precalcula como una matriz CSR P[s, a, s'] (P_indptr, P_indices, P_data;
+    fila s * nro_acciones + a) junto con el reward esperado reward_esperado[s, a] = Σ P[s,a,s'] R(s').
+        - transicion / transicion_vectorizada muestrean s' con tablas de alias (O(1) por muestra)
+          usando el generador propio del tablero ('semilla')
+        - esperanza(v) calcula Σ P[s,a,s'] v[s'] para todos los pares a la vez (producto matriz-vector
+          disperso); es lo que usan los backups esperados de programacion_dinamica y evaluacion
+    'siguiente_estado' se conserva con el movimiento de una celda, pero no describe las dinámicas:
+    el código que asume transiciones deterministas revisa el atributo 'estocastico'.
+    """
+
+    estocastico = True
+
+    def __init__(
+        self,
+        nro_filas: int,
+        nro_columnas: int,
+        celdas_victoria: List[int],
+        celdas_perdida: List[int],
+        celdas_escalera: List[Tuple[int]],
+        celdas_rodadero: List[Tuple[int]],
+        r_victoria: float = 200.0,
+        r_perdida: float = -200.0,
+        r_otros: float = -1.0,
+        probabilidades_dado: Sequence[float] = DADO_6,
+        semilla=None,
+    ):
+        super().__init__(
+            nro_filas, nro_columnas, celdas_victoria, celdas_perdida, celdas_escalera, celdas_rodadero,
+            r_victoria, r_perdida, r_otros
+        )
+        probabilidades_dado = np.asarray(probabilidades_dado, dtype=float)
+        if probabilidades_dado.ndim != 1 or (probabilidades_dado < 0).any() or probabilidades_dado.sum() <= 0:
+            raise ValueError("probabilidades_dado debe ser un vector no negativo con suma positiva")
+        self.probabilidades_dado = probabilidades_dado / probabilidades_dado.sum()
+        self.nro_acciones = len(ACCIONES)
+
+        # Modelo CSR y reward esperado
+        self.P_indptr, self.P_indices, self.P_data = construir_P(self, self.probabilidades_dado)
+        # Fila de cada entrada (para la suma por fila con bincount)
+        self._P_filas = np.repeat(np.arange(len(self.P_indptr) - 1), np.diff(self.P_indptr))
+        self.reward_esperado = self.esperanza(self.reward_celda)
+
+        # Tablas de alias; '_fila_alias[fila CSR]' es la fila compacta (-1 si la fila está vacía)
+        filas, self._alias_prob, self._alias = construir_alias(self.P_indptr, self.P_data)
+        self._alias_K = self._alias_prob.shape[1]
+        self._fila_alias = np.full(len(self.P_indptr) - 1, -1, dtype=np.int64)
+        self._fila_alias[filas] = np.arange(len(filas))
+
+        self.rng = np.random.default_rng(semilla)
+        self._bloque = []
+        self._i_bloque = 0
+
+    def huella(self) -> str:
+        """
+        Huella de Tablero más la distribución del dado
+        """
+        h = hashlib.sha256(super().huella().encode())
+        h.update(self.probabilidades_dado.tobytes())
+        return h.hexdigest()
+
+    # Modelo esperado ----------------------------------------------------------------
+    def esperanza(self, v: np.ndarray) -> np.ndarray:
+        """
+        Producto matriz-vector disperso: (P v)[s, a] = Σ P[s, a, s'] * v[s'] para un array 'v'
+        indexado por número de celda. Retorna un array (celda_max + 1, nro_acciones); las filas
+        vacías (acciones no válidas, terminales) valen 0.
+        """
+        suma = np.bincount(self._P_filas, weights=self.P_data * v[self.P_indices], minlength=len(self.P_indptr) - 1)
+        return suma.reshape(-1, self.nro_acciones)
+
+    def sucesores(self, estados: np.ndarray, acciones: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Entradas de las filas CSR de los pares (estados[i], acciones[i]) en formato COO: (i, s', probabilidad)
+        """
+        filas = np.asarray(estados) * self.nro_acciones + np.asarray(acciones)
+        inicios = self.P_indptr[filas]
+        largos = self.P_indptr[filas + 1] - inicios
+        origen = np.repeat(np.arange(len(filas)), largos)
+        entradas = np.arange(len(origen)) - np.repeat(np.cumsum(largos) - largos - inicios, largos)
+        return origen, self.P_indices[entradas], self.P_data[entradas]
+
+    # Muestreo -------------------------------------------------------------------------
+    def _uniforme(self) -> float:
+        """
+        Siguiente número uniforme en [0, 1) del bloque pre-generado
+        """
+        if self._i_bloque == len(self._bloque):
+            self._bloque = self.rng.random(TAM_BLOQUE_RNG).tolist()
+            self._i_bloque = 0
+        u = self._bloque[self._i_bloque]
+        self._i_bloque += 1
+        return u
+
+    def _muestrear(self, filas, u):
+        """
+        Muestreo con alias para filas CSR (escalar o array) con un solo uniforme por muestra:
+        la parte entera de u*K elige la posición y la parte fraccionaria decide entre ella y su alias
+        """
+        x = u * self._alias_K
+        k = np.minimum(np.floor(x).astype(np.int64), self._alias_K - 1)
+        compacta = self._fila_alias[filas]
+        posicion = np.where(x - k < self._alias_prob[compacta, k], k, self._alias[compacta, k])
+        return self.P_indices[self.P_indptr[filas] + posicion]
+
+    def transicion(self, estado, accion):
+        """
+        Muestrea la celda siguiente desde P[estado, accion, :]
+        """
+        fila = estado * self.nro_acciones + INDICE_ACCION[accion]
+        inicio = self.P_indptr.item(fila)
+        largo = self.P_indptr.item(fila + 1) - inicio
+        if largo <= 1:
+            # Movimiento determinista, o fila vacía (sin movimiento, igual que en Tablero)
+            return self.P_indices.item(inicio) if largo else estado
+        x = self._uniforme() * self._alias_K
+        k = int(x)
+        compacta = self._fila_alias.item(fila)
+        if x - k >= self._alias_prob.item(compacta, k):
+            k = int(self._alias.item(compacta, k))
+        return self.P_indices.item(inicio + k)
+
+    def transicion_vectorizada(self, estados: np.ndarray, acciones: np.ndarray) -> np.ndarray:
+        """
+        Equivalente a 'transicion' para arrays de estados e índices de acción (ver INDICE_ACCION)
+        """
+        filas = np.asarray(estados) * self.nro_acciones + np.asarray(acciones)
+        return self._muestrear(filas, self.rng.random(filas.shape))
+
+    def sembrar(self, semilla) -> None:
+        """
+        Reinicia el generador del tablero (p.ej. una semilla distinta por proceso)
+        """
+        self.rng = np.random.default_rng(semilla)
+        self._bloque = []
+        self._i_bloque = 0
+
+    def estado_rng(self) -> str:
+        """
+        Estado del generador del tablero (JSON), incluyendo los números del bloque aún no usados
+        """
+        return json.dumps({
+            "bit_generator": self.rng.bit_generator.state,
+            "bloque": self._bloque[self._i_bloque:],
+        })
+
+    def restaurar_rng(self, estado: str) -> None:
+        estado = json.loads(estado)
+        self.rng.bit_generator.state = estado["bit_generator"]
+        self._bloque = estado["bloque"]
+        self._i_bloque = 0
@@ -0,0 +1,182 @@
+from typing import Dict, List
+import numpy as np
+from tablero import Tablero, INDICE_ACCION
+from qtabla import QTablaDensa
+from helpers import cargar_Qtabla, cargar_Qtabla_checkpoint
+# Resultado de un recorrido greedy desde un estado inicial (códigos compartidos con ResultadosRun)
+from historial import VICTORIA, PERDIDA, CICLO, RESULTADOS
+
+
+def politica_greedy(tablero: Tablero, Qtabla) -> np.ndarray:
+    """
+    Extrae la política greedy de una Q-tabla (diccionario, QTablaDensa o array (celda_max, nro_acciones))
+    como un array (celda_max + 1,) de índices de acción (índice 0 sin uso).
+        - Solo se consideran las acciones válidas de cada estado; los pares no visitados valen 0
+        - Empates: primera acción en el orden de ACCIONES (igual que AgenteQLearning con epsilon=0
+          sin desempate aleatorio, y que obtener_Qmax_politica)
+        - Estados terminales sin acciones: INDICE_ACCION[None]
+    """
+    if isinstance(Qtabla, dict):
+        densa = QTablaDensa(tablero.acciones_validas[1:])
+        densa.update(Qtabla)
+        Qtabla = densa
+    Q = np.asarray(Qtabla.Q if isinstance(Qtabla, QTablaDensa) else Qtabla)
+
+    validas = tablero.acciones_validas
+    politica = np.full(tablero.celda_max + 1, INDICE_ACCION[None], dtype=np.int64)
+    politica[1:] = np.where(validas[1:], Q, -np.inf).argmax(axis=1)
+    return politica
+
+
+def evaluar_politica(tablero: Tablero, Qtabla, estados_iniciales=None, gamma: float = 1.0) -> Dict:
+    """
+    Evalúa la política greedy de 'Qtabla' sin modificarla, desde todos los estados indicados a la vez
+    (None = todos los estados no terminales).
+
+    Como la política y las transiciones son deterministas, cada estado tiene un único sucesor. Los
+    recorridos se calculan para todos los estados con duplicación de punteros: en la iteración k,
+    'salto[s]' es el estado alcanzado tras 2^k pasos desde s (los terminales son absorbentes) y se
+    acumulan los pasos y el retorno descontado del tramo. Tras ceil(log2(celda_max)) + 1 iteraciones,
+    un estado cuyo salto no es terminal está en un ciclo (la política nunca termina desde ahí).
+
+    Retorna un diccionario con arrays por estado inicial ('estados', 'resultado' (VICTORIA, PERDIDA o
+    CICLO), 'pasos', 'retorno'; pasos y retorno son NaN/-1 en ciclos) y los resúmenes 'tasa_victoria',
+    'tasa_perdida', 'tasa_ciclo', 'pasos_medios' y 'retorno_medio' (sobre los recorridos que terminan).
+    Para TableroEstocastico ver evaluar_politica_esperada.
+    """
+    if tablero.estocastico:
+        raise ValueError("evaluar_politica requiere transiciones deterministas; usar evaluar_politica_esperada")
+    politica = politica_greedy(tablero, Qtabla)
+    celdas = np.arange(tablero.celda_max + 1)
+    terminal = tablero.terminal
+
+    # Un paso: sucesor, número de pasos (0 en terminales) y reward
+    salto = np.where(terminal, celdas, tablero.siguiente_estado[celdas, politica])
+    salto[0] = 0
+    pasos = (~terminal).astype(np.int64)
+    pasos[0] = 0
+    retorno = np.where(terminal, 0.0, tablero.reward_celda[salto])
+
+    # Duplicación de punteros: cubrir recorridos de hasta celda_max pasos
+    for _ in range(int(np.ceil(np.log2(tablero.celda_max))) + 1):
+        retorno = retorno + gamma ** pasos * retorno[salto]
+        pasos = pasos + pasos[salto]
+        salto = salto[salto]
+
+    if estados_iniciales is None:
+        estados = np.flatnonzero(~terminal[1:]) + 1
+    else:
+        estados = np.asarray(estados_iniciales, dtype=np.int64)
+    final = salto[estados]
+
+    resultado = np.full(len(estados), CICLO, dtype=np.int8)
+    resultado[np.isin(final, list(tablero.set_victoria))] = VICTORIA
+    resultado[np.isin(final, list(tablero.set_perdida))] = PERDIDA
+    termina = resultado != CICLO
+    pasos_estado = np.where(termina, pasos[estados], -1)
+    retorno_estado = np.where(termina, retorno[estados], np.nan)
+
+    n = max(len(estados), 1)
+    return {
+        "estados": estados,
+        "resultado": resultado,
+        "pasos": pasos_estado,
+        "retorno": retorno_estado,
+        "tasa_victoria": float(np.count_nonzero(resultado == VICTORIA) / n),
+        "tasa_perdida": float(np.count_nonzero(resultado == PERDIDA) / n),
+        "tasa_ciclo": float(np.count_nonzero(resultado == CICLO) / n),
+        "pasos_medios": float(pasos_estado[termina].mean()) if termina.any() else float("nan"),
+        "retorno_medio": float(retorno_estado[termina].mean()) if termina.any() else float("nan"),
+    }
+
+
+def evaluar_politica_esperada(
+    tablero: Tablero, Qtabla, estados_iniciales=None, gamma: float = 1.0, tol: float = 1e-10, max_iter: int = 100_000
+) -> Dict:
+    """
+    Evaluación exacta (sin simulación) de la política greedy de 'Qtabla' sobre cualquier tablero,
+    incluido TableroEstocastico. Con la matriz de transición de la política (Tablero.sucesores) se
+    itera, como productos matriz-vector dispersos y para todos los estados a la vez:
+        - probabilidad de victoria / pérdida: x(s) = Σ P(s'|s,π(s)) x(s'), con x fijo en los terminales
+        - pasos esperados:                    t(s) = 1 + Σ P(s'|s,π(s)) t(s')
+        - retorno esperado:                   g(s) = Σ P(s'|s,π(s)) (R(s') + γ g(s'))
+    hasta que el cambio máximo sea menor a 'tol' o 'max_iter' iteraciones.
+
+    Retorna un diccionario con arrays por estado inicial ('estados', 'prob_victoria', 'prob_perdida',
+    'pasos', 'retorno'; pasos y retorno son NaN si la política puede no terminar desde el estado)
+    y los promedios 'prob_victoria_media', 'prob_perdida_media', 'pasos_medios' y 'retorno_medio'.
+    """
+    politica = politica_greedy(tablero, Qtabla)
+    celdas = np.arange(tablero.celda_max + 1)
+    terminal = tablero.terminal
+    origen, siguientes, probabilidad = tablero.sucesores(celdas, politica)
+    # Los terminales son absorbentes: sin sucesores
+    probabilidad = np.where(terminal[origen] | (origen == 0), 0.0, probabilidad)
+    rewards = np.bincount(origen, weights=probabilidad * tablero.reward_celda[siguientes], minlength=len(celdas))
+    no_terminal = (~terminal).astype(float)
+    no_terminal[0] = 0.0
+
+    def esperanza(v):
+        return np.bincount(origen, weights=probabilidad * v[siguientes], minlength=len(celdas))
+
+    victoria = np.zeros(len(celdas))
+    victoria[list(tablero.set_victoria)] = 1.0
+    perdida = np.zeros(len(celdas))
+    perdida[list(tablero.set_perdida)] = 1.0
+    prob_victoria, prob_perdida = victoria.copy(), perdida.copy()
+    pasos = np.zeros(len(celdas))
+    retorno = np.zeros(len(celdas))
+    for _ in range(max_iter):
+        nuevos = (
+            victoria + esperanza(prob_victoria),
+            perdida + esperanza(prob_perdida),
+            no_terminal + esperanza(pasos),
+            rewards + gamma * esperanza(retorno),
+        )
+        delta = max(np.max(np.abs(n - v)) for n, v in zip(nuevos, (prob_victoria, prob_perdida, pasos, retorno)))
+        prob_victoria, prob_perdida, pasos, retorno = nuevos
+        if delta < tol:
+            break
+
+    if estados_iniciales is None:
+        estados = np.flatnonzero(~terminal[1:]) + 1
+    else:
+        estados = np.asarray(estados_iniciales, dtype=np.int64)
+    termina = prob_victoria[estados] + prob_perdida[estados] > 1.0 - np.sqrt(tol)
+    pasos_estado = np.where(termina, pasos[estados], np.nan)
+    retorno_estado = np.where(termina, retorno[estados], np.nan)
+    return {
+        "estados": estados,
+        "prob_victoria": prob_victoria[estados],
+        "prob_perdida": prob_perdida[estados],
+        "pasos": pasos_estado,
+        "retorno": retorno_estado,
+        "prob_victoria_media": float(prob_victoria[estados].mean()) if len(estados) else float("nan"),
+        "prob_perdida_media": float(prob_perdida[estados].mean()) if len(estados) else float("nan"),
+        "pasos_medios": float(np.nanmean(pasos_estado)) if termina.any() else float("nan"),
+        "retorno_medio": float(np.nanmean(retorno_estado)) if termina.any() else float("nan"),
+    }
+
+
+def evaluar_checkpoints(paths: List[str], tablero: Tablero, estados_iniciales=None, gamma: float = 1.0) -> List[Dict]:
+    """
+    Evalúa muchas Q-tablas guardadas (checkpoints de run() o archivos de guardar_Qtabla), leídas con
+    memory mapping. Retorna una fila por archivo con los resúmenes de evaluar_politica (o de
+    evaluar_politica_esperada si el tablero es estocástico).
+    """
+    filas = []
+    for path in paths:
+        with np.load(path) as datos:
+            es_checkpoint = "episodio" in datos.files
+        if es_checkpoint:
+            episodio, Qtabla = cargar_Qtabla_checkpoint(path, tablero, mmap=True)
+        else:
+            episodio, Qtabla = None, cargar_Qtabla(path, tablero, mmap=True)
+        evaluar = evaluar_politica_esperada if tablero.estocastico else evaluar_politica
+        evaluacion = evaluar(tablero, Qtabla, estados_iniciales, gamma)
+        filas.append({
+            "path": path,
+            "episodio": episodio,
+            **{k: v for k, v in evaluacion.items() if not isinstance(v, np.ndarray)},
+        })
+    return filas
@@ -0,0 +1,112 @@
+from typing import Set
+import bisect
+import numpy as np
+from tablero import Tablero
+
+
+def _victoria_alcanzable(celda_max: int, destinos: dict, perdidas: Set[int], victorias: Set[int]):
+    """
+    Búsqueda sobre intervalos: las celdas especiales (inicios de escalera/rodadero, pérdidas y
+    victorias) parten la línea 1..celda_max en intervalos de celdas libres. Desde una celda libre
+    se alcanza cualquier celda de su intervalo y las dos especiales que lo limitan.
+    Retorna (alcanzable, límite superior del intervalo alcanzado más alto)
+    """
+    especiales = sorted({*destinos, *perdidas, *victorias})
+
+    def intervalo(celda):
+        # Intervalo k: celdas libres entre especiales[k - 1] y especiales[k]
+        return bisect.bisect_left(especiales, celda)
+
+    def entrar(celda, visitados):
+        """
+        Intervalo al que se llega al pisar 'celda' (siguiendo escaleras/rodaderos encadenados).
+        Retorna 'victoria', None (pérdida o ciclo) o el índice del intervalo
+        """
+        while celda in destinos:
+            if celda in visitados:
+                return None
+            visitados.add(celda)
+            celda = destinos[celda]
+        if celda in victorias:
+            return "victoria"
+        if celda in perdidas:
+            return None
+        return intervalo(celda)
+
+    alcanzados = {intervalo(1)}
+    pendientes = [intervalo(1)]
+    while pendientes:
+        k = pendientes.pop()
+        for limite in (k - 1, k):
+            if 0 <= limite < len(especiales):
+                destino = entrar(especiales[limite], set())
+                if destino == "victoria":
+                    return True, None
+                if destino is not None and destino not in alcanzados:
+                    alcanzados.add(destino)
+                    pendientes.append(destino)
+
+    k_max = max(alcanzados)
+    return False, especiales[k_max] if k_max < len(especiales) else None
+
+
+def generar_tablero(
+    nro_filas: int,
+    nro_columnas: int,
+    n_escaleras: int = None,
+    n_rodaderos: int = None,
+    n_perdidas: int = None,
+    semilla=None,
+    r_victoria: float = 100.0,
+    r_perdida: float = -100.0,
+    r_otros: float = -1.0,
+) -> Tablero:
+    """
+    Genera un tablero aleatorio (reproducible con 'semilla') con victoria en la última celda.
+    Por defecto ~5% de escaleras, ~5% de rodaderos y ~2% de celdas de pérdida.
+        - Inicios de escalera/rodadero y pérdidas son celdas distintas (sin la celda 1 ni la de victoria)
+        - Las escaleras terminan en una celda mayor a su inicio; los rodaderos, en una menor
+    Se garantiza que la victoria es alcanzable desde la celda 1: mientras no lo sea, se elimina la
+    celda especial que cierra el intervalo alcanzado más alto.
+    """
+    rng = np.random.default_rng(semilla)
+    celda_max = nro_filas * nro_columnas
+    n_escaleras = max(1, celda_max // 20) if n_escaleras is None else n_escaleras
+    n_rodaderos = max(1, celda_max // 20) if n_rodaderos is None else n_rodaderos
+    n_perdidas = max(1, celda_max // 50) if n_perdidas is None else n_perdidas
+    n_especiales = n_escaleras + n_rodaderos + n_perdidas
+    if n_especiales > celda_max - 2:
+        raise ValueError(f"{n_especiales} celdas especiales no caben en un tablero de {celda_max} celdas")
+
+    # Celdas especiales distintas, entre 2 y celda_max - 1
+    especiales = rng.choice(celda_max - 2, n_especiales, replace=False) + 2
+    inicios_esc = especiales[:n_escaleras]
+    inicios_rod = especiales[n_escaleras:n_escaleras + n_rodaderos]
+    perdidas = especiales[n_escaleras + n_rodaderos:]
+    finales_esc = rng.integers(inicios_esc + 1, celda_max + 1)
+    finales_rod = rng.integers(1, inicios_rod)
+
+    # Reparación: eliminar especiales hasta que la victoria sea alcanzable
+    escaleras = dict(zip(inicios_esc.tolist(), finales_esc.tolist()))
+    rodaderos = dict(zip(inicios_rod.tolist(), finales_rod.tolist()))
+    set_perdidas = set(perdidas.tolist())
+    while True:
+        alcanzable, bloqueo = _victoria_alcanzable(celda_max, {**escaleras, **rodaderos}, set_perdidas, {celda_max})
+        if alcanzable:
+            break
+        for conjunto in (escaleras, rodaderos, set_perdidas):
+            if bloqueo not in conjunto:
+                continue
+            if isinstance(conjunto, set):
+                conjunto.remove(bloqueo)
+            else:
+                conjunto.pop(bloqueo)
+
+    return Tablero(
+        nro_filas, nro_columnas,
+        celdas_victoria=[celda_max],
+        celdas_perdida=sorted(set_perdidas),
+        celdas_escalera=list(escaleras.items()),
+        celdas_rodadero=list(rodaderos.items()),
+        r_victoria=r_victoria, r_perdida=r_perdida, r_otros=r_otros,
+    )
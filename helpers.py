@@ -1,5 +1,10 @@
 from typing import Tuple, List
-from tablero import coord_a_celda
+from tablero import Tablero, ACCIONES, coord_a_celda
+from qtabla import QTablaDensa
+import hashlib
+import zipfile
+import struct
+import os
 import numpy as np
 
 
@@ -12,63 +17,284 @@ def cambio_coord(coord, nro_cols=10, nro_filas=10):
     return col + 1, nro_filas - fila
 
 
-def leer_tablero(file) -> Tuple[List, List, List, List]:
+def leer_tablero(file, nro_filas=10, nro_columnas=10, cache_dir=None) -> Tuple[List, List, List, List]:
     """
     Lee la definición del tablero desde un archivo, adapta las coordenadas y las transforma
-    a números de celda para ser procesadas de forma adecuada por la clase 'Tablero'
+    a números de celda para ser procesadas de forma adecuada por la clase 'Tablero'.
+        - El archivo se lee y convierte a enteros en una sola pasada (sin recorrer línea por línea)
+        - Si se indica 'cache_dir', el resultado se guarda en un .npz identificado por el hash
+          del contenido y las dimensiones; las siguientes lecturas del mismo tablero no lo parsean
     """
     print(f"Generando tablero desde {file}...")
 
-    with open(file, 'r') as f:
-        primera_linea = f.readline().strip()
-        # Según especificación del proyecto tenemos:
-        # n escaleras, m rodaderos, s pérdidas, y t victorias
-        n, m, s, t = map(int, primera_linea.split())
-
-        # Rodaderos
-        rodaderos = []
-        for _ in range(n):
-            fila1, col1, fila2, col2 = map(int, f.readline().split())
-            x1, y1 = cambio_coord((fila1, col1))
-            x2, y2 = cambio_coord((fila2, col2))
-            rodaderos.append((coord_a_celda(x1, y1), coord_a_celda(x2, y2)))
-
-        # Escaleras
-        escaleras = []
-        for _ in range(m):
-            fila1, col1, fila2, col2 = map(int, f.readline().split())
-            x1, y1 = cambio_coord((fila1, col1))
-            x2, y2 = cambio_coord((fila2, col2))
-            escaleras.append((coord_a_celda(x1, y1), coord_a_celda(x2, y2)))
-
-        # Pérdida
-        perdida = []
-        for _ in range(s):
-            fila1, col1 = map(int, f.readline().split())
-            x, y = cambio_coord((fila1, col1))
-            perdida.append(coord_a_celda(x, y))
-
-        # Victoria
-        victoria = []
-        for _ in range(t):
-            fila1, col1 = map(int, f.readline().split())
-            x, y = cambio_coord((fila1, col1))
-            victoria.append(coord_a_celda(x, y))
-
-    return rodaderos, escaleras, perdida, victoria
-
-
-def guardar_Qtabla(path: str, Qtabla: dict):
-    """
-    Transforma una Q-tabla (dict) a un array de Numpy y guarda el archivo como .npy
-    """
-    arr = np.array(list(Qtabla.items()), dtype=object)
-    np.save(path, arr)
+    with open(file, 'rb') as f:
+        contenido = f.read()
+
+    path_cache = None
+    if cache_dir is not None:
+        h = hashlib.sha256(contenido)
+        h.update(np.array([nro_filas, nro_columnas], dtype=np.int64).tobytes())
+        path_cache = os.path.join(cache_dir, f"tablero_{h.hexdigest()}.npz")
+        if os.path.exists(path_cache):
+            with np.load(path_cache) as datos:
+                return tuple(_a_listas(datos[k]) for k in ("rodaderos", "escaleras", "perdida", "victoria"))
+
+    valores = np.fromstring(contenido.decode(), dtype=np.int64, sep=' ')
+    if len(valores) < 4:
+        raise ValueError(f"{file}: falta la primera línea con la cantidad de cada tipo de celda")
+    # Según especificación del proyecto tenemos:
+    # n escaleras, m rodaderos, s pérdidas, y t victorias
+    n, m, s, t = valores[:4].tolist()
+    esperados = 4 + 4 * (n + m) + 2 * (s + t)
+    if len(valores) != esperados:
+        raise ValueError(f"{file}: se esperaban {esperados} enteros según la primera línea, hay {len(valores)}")
+
+    # Pares (fila, columna) estilo Numpy -> número de celda, para todas las coordenadas a la vez
+    coords = valores[4:].reshape(-1, 2)
+    x, y = cambio_coord((coords[:, 0], coords[:, 1]), nro_columnas, nro_filas)
+    celdas = coord_a_celda(x, y, nro_columnas)
+
+    fin_rod = 2 * n
+    fin_esc = fin_rod + 2 * m
+    fin_per = fin_esc + s
+    partes = {
+        "rodaderos": celdas[:fin_rod].reshape(-1, 2),
+        "escaleras": celdas[fin_rod:fin_esc].reshape(-1, 2),
+        "perdida": celdas[fin_esc:fin_per],
+        "victoria": celdas[fin_per:],
+    }
+    if path_cache is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        guardar_npz_atomico(path_cache, **partes)
+
+    return tuple(_a_listas(v) for v in partes.values())
+
+
+def _a_listas(celdas: np.ndarray) -> List:
+    # Pares como lista de tuplas (inicio, fin); celdas sueltas como lista de enteros
+    if celdas.ndim == 2:
+        return [tuple(par) for par in celdas.tolist()]
+    return celdas.tolist()
+
+
+# Formato de Q-tabla ------------------------------------------------------------------------
+# Archivo .npz sin compresión (sin objetos de Python, no requiere allow_pickle) con:
+#   - version: versión del formato
+#   - Q, visitado: arrays (celda_max, nro_acciones) de QTablaDensa
+#   - acciones: encabezado con el orden de las columnas (repr de cada acción en ACCIONES)
+#   - dimensiones: (nro_filas, nro_columnas)
+#   - huella: Tablero.huella() del tablero con el que se entrenó la Q-tabla
+# Al no estar comprimidos, los arrays se pueden leer con memory mapping (ver cargar_Qtabla)
+VERSION_QTABLA = 1
+
+
+def _encabezado_acciones() -> np.ndarray:
+    return np.array([repr(a) for a in ACCIONES])
+
+
+def guardar_npz_atomico(path: str, **arrays) -> None:
+    """
+    Escribe un .npz en un archivo temporal y lo renombra, de modo que 'path' nunca queda a medio escribir
+    """
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp, path)
+
+
+def guardar_Qtabla(path: str, Qtabla, tablero: Tablero):
+    """
+    Guarda una Q-tabla (dict o QTablaDensa) en el formato .npz descrito arriba
+    """
+    if not isinstance(Qtabla, QTablaDensa):
+        densa = QTablaDensa(tablero.acciones_validas[1:])
+        densa.update(Qtabla)
+        Qtabla = densa
+    guardar_npz_atomico(
+        path,
+        version=np.array(VERSION_QTABLA),
+        Q=np.asarray(Qtabla.Q, dtype=np.float64),
+        visitado=np.asarray(Qtabla.visitado),
+        acciones=_encabezado_acciones(),
+        dimensiones=np.array([tablero.nro_filas, tablero.nro_columnas]),
+        huella=np.array(tablero.huella()),
+    )
     print(f"Q-tabla guardada en {path}")
 
 
-def cargar_Qtabla(path):
+def _memmap_npz(path: str, nombre: str) -> np.ndarray:
+    """
+    Memory mapping (solo lectura) de un array guardado sin compresión dentro de un .npz
+    """
+    with zipfile.ZipFile(path) as zf:
+        info = zf.getinfo(f"{nombre}.npy")
+    if info.compress_type != zipfile.ZIP_STORED:
+        raise ValueError(f"'{nombre}' está comprimido en {path} y no admite memory mapping")
+    with open(path, "rb") as f:
+        # Encabezado local del zip: 30 bytes fijos + nombre + campo extra
+        f.seek(info.header_offset)
+        encabezado_zip = f.read(30)
+        largo_nombre, largo_extra = struct.unpack("<HH", encabezado_zip[26:30])
+        f.seek(info.header_offset + 30 + largo_nombre + largo_extra)
+        # Encabezado del .npy
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            forma, fortran, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            forma, fortran, dtype = np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+    return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=forma, order="F" if fortran else "C")
+
+
+def cargar_Qtabla(path, tablero: Tablero, mmap: bool = False) -> QTablaDensa:
+    """
+    Carga una Q-tabla guardada con guardar_Qtabla y valida que corresponda al tablero.
+    Con mmap=True los arrays se leen con memory mapping (solo lectura, sin copiar), útil
+    para evaluar la misma Q-tabla desde muchos procesos.
+    """
     print(f"Cargando Q-tabla desde {path}")
-    Qtabla_arr = np.load(path, allow_pickle=True)
-    Qtabla_dict = dict(Qtabla_arr.tolist())
-    return Qtabla_dict
+    if not zipfile.is_zipfile(path):
+        raise ValueError(f"{path} no tiene el formato actual de Q-tabla; convertirlo con convertir_Qtabla")
+
+    with np.load(path) as datos:
+        version = int(datos["version"])
+        acciones = datos["acciones"]
+        dimensiones = tuple(datos["dimensiones"].tolist())
+        huella = str(datos["huella"])
+        if not mmap:
+            Q, visitado = datos["Q"], datos["visitado"]
+
+    # Validaciones
+    if version != VERSION_QTABLA:
+        raise ValueError(f"Versión de Q-tabla no soportada: {version}")
+    if not np.array_equal(acciones, _encabezado_acciones()):
+        raise ValueError(f"Las acciones de la Q-tabla {acciones.tolist()} no coinciden con {list(ACCIONES)}")
+    if dimensiones != (tablero.nro_filas, tablero.nro_columnas):
+        raise ValueError(
+            f"La Q-tabla es de un tablero {dimensiones[0]}x{dimensiones[1]}, "
+            f"no de {tablero.nro_filas}x{tablero.nro_columnas}"
+        )
+    if huella != tablero.huella():
+        raise ValueError("La Q-tabla fue entrenada en un tablero distinto (la huella no coincide)")
+
+    if mmap:
+        Q, visitado = _memmap_npz(path, "Q"), _memmap_npz(path, "visitado")
+    Qtabla = QTablaDensa(tablero.acciones_validas[1:], Q=Q)
+    Qtabla.visitado = visitado
+    return Qtabla
+
+
+def convertir_Qtabla(path_antiguo: str, path_nuevo: str, tablero: Tablero) -> None:
+    """
+    Convierte una Q-tabla del formato anterior (.npy con un array de objetos (estado, acción) -> Q,
+    p.ej. Qtabla.npy) al formato actual. Es el único caso que requiere allow_pickle=True.
+    """
+    Qtabla_arr = np.load(path_antiguo, allow_pickle=True)
+    guardar_Qtabla(path_nuevo, dict(Qtabla_arr.tolist()), tablero)
+
+
+# Checkpoints de entrenamiento ---------------------------------------------------------------
+# Archivo .npz (mismo criterio que la Q-tabla: sin pickle, escritura atómica) con:
+#   - version, huella del tablero
+#   - episodio: último episodio completado
+#   - Q, visitado, tabla_densa: Q-tabla del agente y su modo
+#   - epsilon: epsilon vigente del agente
+#   - rng: estado del generador del agente (JSON)
+#   - rng_tablero: estado del generador del tablero (JSON, solo con TableroEstocastico)
+#   - replay_*: estado del experience replay (solo si run() usa uno, ver replay.Replay.estado)
+#   - convergencia_*: estado del criterio de parada (solo si run() usa uno, ver CriterioConvergencia.estado)
+#   - historiales adicionales de run (reward, pasos, victorias, epsilon y segundos por episodio, scheduler)
+# Versión 2: historiales de ResultadosRun (un epsilon por episodio y la duración de cada episodio)
+VERSION_CHECKPOINT = 2
+
+
+def guardar_checkpoint(
+    path: str, tablero: Tablero, agente, episodio: int, replay=None, convergencia=None, **historiales
+) -> None:
+    Qtabla = agente.Qtabla
+    if not isinstance(Qtabla, QTablaDensa):
+        densa = QTablaDensa(tablero.acciones_validas[1:])
+        densa.update(Qtabla)
+        Qtabla = densa
+    guardar_npz_atomico(
+        path,
+        version=np.array(VERSION_CHECKPOINT),
+        huella=np.array(tablero.huella()),
+        episodio=np.array(episodio),
+        Q=Qtabla.Q,
+        visitado=Qtabla.visitado,
+        tabla_densa=np.array(agente.tabla_densa),
+        epsilon=np.array(agente.epsilon),
+        rng=np.array(agente.estado_rng()),
+        **({"rng_tablero": np.array(tablero.estado_rng())} if tablero.estocastico else {}),
+        **{f"extra_{nombre}": np.asarray(valores) for nombre, valores in agente.estado_extra().items()},
+        **({f"replay_{nombre}": valores for nombre, valores in replay.estado().items()} if replay is not None else {}),
+        **({f"convergencia_{nombre}": valores for nombre, valores in convergencia.estado().items()}
+           if convergencia is not None else {}),
+        **{f"historial_{nombre}": np.asarray(valores) for nombre, valores in historiales.items()},
+    )
+
+
+def cargar_Qtabla_checkpoint(path: str, tablero: Tablero, mmap: bool = False) -> Tuple[int, QTablaDensa]:
+    """
+    Lee solo la Q-tabla de un checkpoint (sin tocar ningún agente), validando versión y huella.
+    Retorna (episodio, Q-tabla). Con mmap=True los arrays no se copian a memoria.
+    """
+    with np.load(path) as datos:
+        if int(datos["version"]) != VERSION_CHECKPOINT:
+            raise ValueError(f"Versión de checkpoint no soportada: {int(datos['version'])}")
+        if str(datos["huella"]) != tablero.huella():
+            raise ValueError("El checkpoint fue generado en un tablero distinto (la huella no coincide)")
+        episodio = int(datos["episodio"])
+        if not mmap:
+            Q, visitado = datos["Q"], datos["visitado"]
+    if mmap:
+        Q, visitado = _memmap_npz(path, "Q"), _memmap_npz(path, "visitado")
+    Qtabla = QTablaDensa(tablero.acciones_validas[1:], Q=Q)
+    Qtabla.visitado = visitado
+    return episodio, Qtabla
+
+
+def cargar_checkpoint(path: str, tablero: Tablero, agente, replay=None, convergencia=None) -> Tuple[int, dict]:
+    """
+    Restaura en el agente la Q-tabla, epsilon, el estado de su generador aleatorio y sus arrays
+    adicionales (Agente.estado_extra), el generador del tablero si es estocástico y, si se indican,
+    el estado del experience replay y del criterio de convergencia.
+    Retorna el último episodio completado y los historiales guardados.
+    """
+    with np.load(path) as datos:
+        if int(datos["version"]) != VERSION_CHECKPOINT:
+            raise ValueError(f"Versión de checkpoint no soportada: {int(datos['version'])}")
+        if str(datos["huella"]) != tablero.huella():
+            raise ValueError("El checkpoint fue generado en un tablero distinto (la huella no coincide)")
+        if bool(datos["tabla_densa"]) != agente.tabla_densa:
+            raise ValueError("El modo de Q-tabla (tabla_densa) del agente no coincide con el del checkpoint")
+
+        Qtabla = QTablaDensa(tablero.acciones_validas[1:], Q=datos["Q"])
+        Qtabla.visitado = datos["visitado"]
+        agente.Qtabla = Qtabla
+        agente.epsilon = float(datos["epsilon"])
+
+        agente.restaurar_rng(str(datos["rng"]))
+        if "rng_tablero" in datos.files:
+            tablero.restaurar_rng(str(datos["rng_tablero"]))
+        extra = {clave[len("extra_"):]: datos[clave] for clave in datos.files if clave.startswith("extra_")}
+        if extra:
+            agente.restaurar_estado_extra(extra)
+        if replay is not None:
+            estado_replay = {clave[len("replay_"):]: datos[clave] for clave in datos.files if clave.startswith("replay_")}
+            if not estado_replay:
+                raise ValueError("El checkpoint no contiene el estado del replay")
+            replay.restaurar(estado_replay)
+        if convergencia is not None:
+            estado_convergencia = {
+                clave[len("convergencia_"):]: datos[clave] for clave in datos.files if clave.startswith("convergencia_")
+            }
+            if not estado_convergencia:
+                raise ValueError("El checkpoint no contiene el estado del criterio de convergencia")
+            convergencia.restaurar(estado_convergencia)
+
+        historiales = {
+            clave[len("historial_"):]: datos[clave] for clave in datos.files if clave.startswith("historial_")
+        }
+        return int(datos["episodio"]), historiales
@@ -0,0 +1,203 @@
+from tablero import Tablero
+from helpers import guardar_npz_atomico
+import numpy as np
+
+# Códigos de resultado de un episodio (ResultadosRun) o de un recorrido greedy (evaluacion, que además
+# reporta CICLO cuando la política no termina)
+VICTORIA, PERDIDA, CICLO = 0, 1, 2
+RESULTADOS = ("victoria", "perdida", "ciclo")
+
+
+class HistorialValores:
+    """
+    Snapshots del estado-valor máximo (maxₐ Q) de cada celda a lo largo del entrenamiento.
+        - 'actual' es la grilla (filas, columnas) vigente; solo se actualizan las celdas
+          visitadas en cada episodio (numpy.nan en celdas nunca visitadas)
+        - Cada 'cada' episodios (y en el último) se copia 'actual' a un array preasignado
+          (snapshots, filas, columnas) de tipo float32
+        - Con 'max_snapshots' el array funciona como ring buffer y conserva los últimos
+    """
+
+    def __init__(self, tablero: Tablero, episodios: int, cada: int = 1, max_snapshots: int = None):
+        self.episodios_totales = episodios
+        self.cada = cada
+        forma = (tablero.nro_filas, tablero.nro_columnas)
+
+        # Índices (fila, columna) en la grilla de cada número de celda (ver Tablero.fila_celda)
+        self.fila_celda = tablero.fila_celda
+        self.col_celda = tablero.columna_celda
+
+        n_snapshots = -(-episodios // cada)
+        self.capacidad = n_snapshots if max_snapshots is None else min(max_snapshots, n_snapshots)
+        self.actual = np.full(forma, np.nan, dtype=np.float32)
+        self._valores = np.full((self.capacidad, *forma), np.nan, dtype=np.float32)
+        self._episodios = np.zeros(self.capacidad, dtype=np.int64)
+        self.n = 0  # Snapshots tomados (incluye los sobrescritos en el ring buffer)
+
+    def actualizar(self, estados, valores) -> None:
+        """
+        Actualiza los valores de las celdas tocadas durante el episodio
+        """
+        estados = np.asarray(estados)
+        self.actual[self.fila_celda[estados], self.col_celda[estados]] = valores
+
+    def snapshot(self, episodio: int, forzar: bool = False) -> None:
+        """
+        Guarda 'actual' cada 'cada' episodios y en el último. Con forzar=True (p.ej. al detener el
+        entrenamiento antes) se guarda siempre, salvo que ya exista el snapshot de ese episodio.
+        """
+        if forzar:
+            if self.n and self._episodios[(self.n - 1) % self.capacidad] == episodio:
+                return
+        elif episodio % self.cada and episodio != self.episodios_totales:
+            return
+        i = self.n % self.capacidad
+        self._valores[i] = self.actual
+        self._episodios[i] = episodio
+        self.n += 1
+
+    @property
+    def valores(self) -> np.ndarray:
+        """
+        Snapshots en orden cronológico: array (snapshots, filas, columnas)
+        """
+        return self._valores[self._orden()]
+
+    @property
+    def episodios(self) -> np.ndarray:
+        """
+        Episodio (desde 1) al que corresponde cada snapshot de 'valores'
+        """
+        return self._episodios[self._orden()]
+
+    def _orden(self) -> np.ndarray:
+        if self.n <= self.capacidad:
+            return np.arange(self.n)
+        return (np.arange(self.capacidad) + self.n) % self.capacidad
+
+
+class ResultadosRun:
+    """
+    Historial por episodio de simulacion.run en arrays tipados preasignados para 'episodios' episodios
+    (sin listas de números de Python):
+        - pasos (int32), reward y epsilon usado en el episodio (float32)
+        - resultado (int8): VICTORIA o PERDIDA (códigos de evaluacion)
+        - segundos (float32): tiempo de reloj de cada episodio
+    Los atributos públicos son vistas de los 'n' episodios registrados.
+    """
+
+    CAMPOS = ("pasos", "reward", "epsilon", "resultado", "segundos")
+
+    def __init__(self, episodios: int):
+        self.capacidad = episodios
+        self._pasos = np.zeros(episodios, dtype=np.int32)
+        self._reward = np.zeros(episodios, dtype=np.float32)
+        self._epsilon = np.zeros(episodios, dtype=np.float32)
+        self._resultado = np.zeros(episodios, dtype=np.int8)
+        self._segundos = np.zeros(episodios, dtype=np.float32)
+        self.n = 0  # Episodios registrados
+
+    def registrar(self, pasos: int, reward: float, epsilon: float, victoria: bool, segundos: float) -> None:
+        i = self.n
+        self._pasos[i] = pasos
+        self._reward[i] = reward
+        self._epsilon[i] = epsilon
+        self._resultado[i] = VICTORIA if victoria else PERDIDA
+        self._segundos[i] = segundos
+        self.n = i + 1
+
+    def restaurar(self, **campos) -> None:
+        """
+        Carga los episodios ya completados (p.ej. desde un checkpoint); todos los campos con el mismo largo
+        """
+        for campo, valores in campos.items():
+            valores = np.asarray(valores)
+            getattr(self, f"_{campo}")[:len(valores)] = valores
+            self.n = len(valores)
+
+    def __len__(self) -> int:
+        return self.n
+
+    # Vistas de los episodios registrados ---------------------------------------------
+    @property
+    def pasos(self) -> np.ndarray:
+        return self._pasos[:self.n]
+
+    @property
+    def reward(self) -> np.ndarray:
+        return self._reward[:self.n]
+
+    @property
+    def epsilon(self) -> np.ndarray:
+        return self._epsilon[:self.n]
+
+    @property
+    def resultado(self) -> np.ndarray:
+        return self._resultado[:self.n]
+
+    @property
+    def segundos(self) -> np.ndarray:
+        return self._segundos[:self.n]
+
+    @property
+    def victorias(self) -> np.ndarray:
+        return self.resultado == VICTORIA
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, f"_{campo}").nbytes for campo in self.CAMPOS)
+
+    # Agregados -------------------------------------------------------------------------
+    def media_movil(self, campo: str = "reward", ventana: int = 100) -> np.ndarray:
+        """
+        Media de los últimos 'ventana' episodios en cada episodio (ventana parcial al inicio), con sumas acumuladas
+        """
+        _validar_ventana(ventana)
+        valores = self.victorias if campo == "victorias" else getattr(self, campo)
+        acumulado = np.concatenate(([0.0], np.cumsum(valores, dtype=np.float64)))
+        fin = np.arange(1, self.n + 1)
+        inicio = np.maximum(fin - ventana, 0)
+        return (acumulado[fin] - acumulado[inicio]) / (fin - inicio)
+
+    def tasa_victoria(self, ventana: int = None) -> float:
+        """
+        Fracción de victorias en todos los episodios o en los últimos 'ventana'
+        """
+        _validar_ventana(ventana)
+        resultado = self.resultado if ventana is None else self.resultado[-ventana:]
+        return float(np.mean(resultado == VICTORIA)) if len(resultado) else float("nan")
+
+    def resumen(self, ventana: int = None) -> dict:
+        """
+        Tasa de victoria, pasos y reward medios y tiempo total (de todos los episodios o los últimos 'ventana')
+        """
+        _validar_ventana(ventana)
+        inicio = 0 if ventana is None else max(0, self.n - ventana)
+        return {
+            "episodios": self.n - inicio,
+            "tasa_victoria": self.tasa_victoria(ventana),
+            "pasos_medios": float(self.pasos[inicio:].mean(dtype=np.float64)) if self.n > inicio else float("nan"),
+            "reward_medio": float(self.reward[inicio:].mean(dtype=np.float64)) if self.n > inicio else float("nan"),
+            "segundos": float(self.segundos[inicio:].sum(dtype=np.float64)),
+        }
+
+    # Exportar ---------------------------------------------------------------------------
+    def guardar(self, path: str) -> None:
+        """
+        Guarda los episodios registrados en un .npz (un array por campo)
+        """
+        guardar_npz_atomico(path, **{campo: getattr(self, campo) for campo in self.CAMPOS})
+
+    @classmethod
+    def cargar(cls, path: str) -> "ResultadosRun":
+        with np.load(path) as datos:
+            campos = {campo: datos[campo] for campo in cls.CAMPOS}
+        resultados = cls(len(campos["pasos"]))
+        resultados.restaurar(**campos)
+        return resultados
+
+
+def _validar_ventana(ventana) -> None:
+    # Con ventana = 0, self.resultado[-0:] sería el historial completo
+    if ventana is not None and ventana <= 0:
+        raise ValueError(f"ventana debe ser positiva, no {ventana}")
@@ -0,0 +1,265 @@
+from typing import Dict, Tuple
+from multiprocessing import shared_memory
+from types import SimpleNamespace
+import multiprocessing as mp
+import traceback
+import queue
+import time
+import numpy as np
+from tablero import Tablero
+from agente import AgenteQLearning
+from qtabla import QTablaDensa
+from simulacion import run
+from registro import Registro, SILENCIO
+from convergencia import CriterioConvergencia
+
+# Modos de acceso a la Q-tabla compartida
+#   "ninguno": Hogwild! puro, sin bloqueos (las actualizaciones concurrentes de un mismo par pueden perderse)
+#   "franjas": un lock por franja de estados (estado - 1) % n_franjas alrededor de cada actualización
+BLOQUEOS = ("ninguno", "franjas")
+
+
+class QTablaCompartida:
+    """
+    Q y visitado de una QTablaDensa en un bloque de multiprocessing.shared_memory:
+    [Q (float64) | visitado (bool)]. El coordinador lo crea (crear=True) y lo libera con 'liberar';
+    los workers se conectan por nombre y solo lo cierran.
+    """
+
+    def __init__(self, forma: Tuple[int, int], nombre: str = None, crear: bool = False):
+        self.forma = forma
+        self._bytes_Q = int(np.prod(forma)) * np.dtype(np.float64).itemsize
+        tamano = self._bytes_Q + int(np.prod(forma))
+        self.shm = shared_memory.SharedMemory(name=nombre, create=crear, size=tamano if crear else 0)
+        self.Q = np.ndarray(forma, dtype=np.float64, buffer=self.shm.buf)
+        self.visitado = np.ndarray(forma, dtype=bool, buffer=self.shm.buf, offset=self._bytes_Q)
+        if crear:
+            self.Q[:] = 0.0
+            self.visitado[:] = False
+
+    @property
+    def nombre(self) -> str:
+        return self.shm.name
+
+    def Qtabla(self, validas: np.ndarray) -> QTablaDensa:
+        """
+        QTablaDensa cuyos arrays son vistas de la memoria compartida
+        """
+        tabla = QTablaDensa(validas, Q=self.Q)
+        tabla.visitado = self.visitado
+        return tabla
+
+    def cerrar(self) -> None:
+        # Las vistas de Numpy deben soltarse antes de cerrar el bloque
+        del self.Q, self.visitado
+        self.shm.close()
+
+    def liberar(self) -> None:
+        self.cerrar()
+        self.shm.unlink()
+
+
+class AgenteFranjas(AgenteQLearning):
+    """
+    AgenteQLearning que toma el lock de la franja del estado actualizado durante actualizar_Q
+    (lectura de Q(Sₜ₊₁, ·) y escritura de Q(Sₜ,Aₜ)). Con tabla densa compartida entre procesos.
+    """
+
+    def __init__(self, *args, bloqueos=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.bloqueos = bloqueos
+
+    def actualizar_Q(self, estado, accion, reward, estado_siguiente) -> None:
+        with self.bloqueos[(estado - 1) % len(self.bloqueos)]:
+            super().actualizar_Q(estado, accion, reward, estado_siguiente)
+
+
+class _Parada:
+    """
+    Criterio de parada para run() dentro de un worker: se detiene cuando el coordinador activa el evento
+    """
+
+    def __init__(self, evento):
+        self.evento = evento
+        self.episodio = None
+        self.motivo = None
+
+    def verificar(self, episodio, tablero, agente, reward_historico) -> bool:
+        if self.evento.is_set():
+            self.episodio, self.motivo = episodio, "detenido por el coordinador"
+            return True
+        return False
+
+
+def _worker(w, nombre_shm, tablero, parametros, episodios, epsilon_ciclos, semilla, bloqueos, evento, cola):
+    compartida, agente = None, None
+    try:
+        compartida = QTablaCompartida(tablero.acciones_validas[1:].shape, nombre=nombre_shm)
+        if bloqueos:
+            agente = AgenteFranjas(tablero, **parametros, tabla_densa=True, semilla=semilla, bloqueos=bloqueos)
+        else:
+            agente = AgenteQLearning(tablero, **parametros, tabla_densa=True, semilla=semilla)
+        agente.Qtabla = compartida.Qtabla(tablero.acciones_validas[1:])
+        if tablero.estocastico:
+            # Cada worker lanza sus propios dados
+            tablero.sembrar(semilla)
+
+        time_s = time.time()
+        resultados, _ = run(
+            tablero, agente, episodios, epsilon_ciclos=epsilon_ciclos,
+            registro=Registro(verbosidad=SILENCIO), convergencia=_Parada(evento),
+        )
+        segundos = time.time() - time_s
+        cola.put({
+            "worker": w,
+            "episodios": len(resultados),
+            "pasos": int(resultados.pasos.sum(dtype=np.int64)),
+            "tasa_victoria": resultados.tasa_victoria(),
+            "reward_medio": float(resultados.reward.mean(dtype=np.float64)) if len(resultados) else float("nan"),
+            "segundos": round(segundos, 4),
+            "episodios_por_segundo": len(resultados) / segundos if segundos > 0 else float("nan"),
+        })
+    except Exception:
+        cola.put({"worker": w, "error": traceback.format_exc()})
+    finally:
+        agente = None
+        if compartida is not None:
+            compartida.cerrar()
+
+
+def entrenar_hogwild(
+    tablero: Tablero,
+    episodios: int,
+    n_workers: int = None,
+    alpha: float = 0.5,
+    epsilon: float = 0.5,
+    gamma: float = 1.0,
+    epsilon_ciclos: int = 5,
+    semilla: int = 0,
+    bloqueo: str = "ninguno",
+    n_franjas: int = 64,
+    convergencia: CriterioConvergencia = None,
+    cada_segundos: float = 1.0,
+    contexto: str = None,
+) -> Tuple[QTablaDensa, Dict]:
+    """
+    Q-learning asíncrono en varios procesos (estilo Hogwild!): 'n_workers' procesos (None = os.cpu_count())
+    corren run() con su propio AgenteQLearning (semilla + w) y 'episodios' / n_workers episodios cada uno,
+    y todos actualizan una única Q-tabla densa en memoria compartida, sin bloqueos (bloqueo="ninguno")
+    o con un lock por franja de estados (bloqueo="franjas").
+
+    El coordinador espera a los workers y, con 'convergencia' (p.ej. CriterioConvergencia(cada=1,
+    politica_estable=5)), revisa la Q-tabla compartida cada 'cada_segundos'; su 'cada' cuenta
+    verificaciones y solo aplican politica_estable y tol_Q. Al cumplirse el criterio, los workers
+    se detienen al terminar su episodio en curso.
+
+    Retorna (copia de la Q-tabla como QTablaDensa, estadísticas): 'workers' (una fila por worker con
+    episodios, pasos, tasa de victoria, reward medio, segundos y episodios por segundo), 'episodios',
+    'pasos', 'segundos', 'episodios_por_segundo' y 'motivo' (de la parada temprana o None).
+    """
+    if bloqueo not in BLOQUEOS:
+        raise ValueError(f"bloqueo debe ser uno de {BLOQUEOS}, no {bloqueo!r}")
+    ctx = mp.get_context(contexto)
+    n_workers = n_workers or mp.cpu_count()
+    episodios_worker = [episodios // n_workers + (w < episodios % n_workers) for w in range(n_workers)]
+    parametros = {"alpha": alpha, "epsilon": epsilon, "gamma": gamma}
+    bloqueos = [ctx.Lock() for _ in range(n_franjas)] if bloqueo == "franjas" else []
+    evento = ctx.Event()
+    cola = ctx.Queue()
+
+    validas = tablero.acciones_validas[1:]
+    compartida = QTablaCompartida(validas.shape, crear=True)
+    procesos, vista = [], None
+    try:
+        time_s = time.time()
+        for w in range(n_workers):
+            p = ctx.Process(
+                target=_worker,
+                args=(w, compartida.nombre, tablero, parametros, episodios_worker[w],
+                      epsilon_ciclos, semilla + w, bloqueos, evento, cola),
+                daemon=True,
+            )
+            p.start()
+            procesos.append(p)
+
+        # Coordinador: recolectar estadísticas y verificar la convergencia de la Q-tabla compartida
+        vista = SimpleNamespace(Qtabla=compartida.Qtabla(validas))
+        filas, verificaciones, motivo = [], 0, None
+        while len(filas) < n_workers:
+            try:
+                filas.append(cola.get(timeout=cada_segundos))
+                continue
+            except queue.Empty:
+                pass
+            if not any(p.is_alive() for p in procesos) and cola.empty():
+                raise RuntimeError("Un worker terminó sin reportar sus estadísticas")
+            if convergencia is not None and not evento.is_set():
+                verificaciones += 1
+                if convergencia.verificar(verificaciones, tablero, vista, []):
+                    motivo = convergencia.motivo
+                    evento.set()
+        for p in procesos:
+            p.join()
+        segundos = time.time() - time_s
+
+        errores = [f["error"] for f in filas if "error" in f]
+        if errores:
+            raise RuntimeError("Error en un worker:\n" + errores[0])
+        Qtabla = QTablaDensa(validas, Q=compartida.Q.copy())
+        Qtabla.visitado = compartida.visitado.copy()
+    finally:
+        evento.set()
+        vista = None
+        for p in procesos:
+            p.join(timeout=5)
+        compartida.liberar()
+
+    filas.sort(key=lambda f: f["worker"])
+    total = sum(f["episodios"] for f in filas)
+    return Qtabla, {
+        "workers": filas,
+        "episodios": total,
+        "pasos": sum(f["pasos"] for f in filas),
+        "segundos": round(segundos, 4),
+        "episodios_por_segundo": total / segundos if segundos > 0 else float("nan"),
+        "motivo": motivo,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    from helpers import leer_tablero, guardar_Qtabla
+    from evaluacion import evaluar_politica, RESULTADOS
+
+    parser = argparse.ArgumentParser(description="Q-learning asíncrono con Q-tabla en memoria compartida")
+    parser.add_argument("--tablero", default="./tablero")
+    parser.add_argument("--episodios", type=int, default=20000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--bloqueo", choices=BLOQUEOS, default="ninguno")
+    parser.add_argument("--politica_estable", type=int, default=None,
+                        help="detener si la política greedy no cambia en N verificaciones (una por segundo)")
+    parser.add_argument("--salida", default="Qtabla.npz")
+    args = parser.parse_args()
+
+    rodaderos, escaleras, perdida, victoria = leer_tablero(args.tablero)
+    tab = Tablero(
+        nro_filas=10, nro_columnas=10,
+        celdas_victoria=victoria, celdas_perdida=perdida,
+        celdas_escalera=escaleras, celdas_rodadero=rodaderos,
+        r_victoria=100, r_perdida=-100, r_otros=-1
+    )
+    criterio = None
+    if args.politica_estable is not None:
+        criterio = CriterioConvergencia(cada=1, politica_estable=args.politica_estable)
+    Qtabla, estadisticas = entrenar_hogwild(
+        tab, args.episodios, args.workers, bloqueo=args.bloqueo, convergencia=criterio
+    )
+    for fila in estadisticas["workers"]:
+        print(fila)
+    print(f"{estadisticas['episodios']} episodios en {estadisticas['segundos']} segundos "
+          f"({estadisticas['episodios_por_segundo']:.1f} episodios/s)")
+    if estadisticas["motivo"] is not None:
+        print(f"Convergencia: {estadisticas['motivo']}")
+    guardar_Qtabla(args.salida, Qtabla, tab)
+    desde_inicio = evaluar_politica(tab, Qtabla, estados_iniciales=[1])
+    print(f"Desde la celda 1: {RESULTADOS[desde_inicio['resultado'][0]]} en {desde_inicio['pasos'][0]} pasos")
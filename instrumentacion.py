@@ -0,0 +1,136 @@
+from typing import Dict
+import contextlib
+import cProfile
+import pstats
+import io
+import time
+import numpy as np
+
+# Fases medidas en run()
+FASES_PASO = ("accion", "transicion", "actualizacion_Q")
+# Experience replay (guardar la transición y los lotes de actualizaciones), medido por paso solo si run() usa replay
+FASES_REPLAY = ("replay",)
+FASES_EPISODIO = ("snapshots", "logging", "checkpoint", "ploteo")
+
+# Contexto vacío que usa run() cuando la instrumentación está desactivada
+SIN_MEDICION = contextlib.nullcontext()
+
+
+def fase_nula(nombre: str):
+    return SIN_MEDICION
+
+
+class _Fase:
+    """
+    Context manager reutilizable que acumula el tiempo de una fase
+    """
+    __slots__ = ("tiempos", "llamadas", "nombre", "_t")
+
+    def __init__(self, nombre, tiempos, llamadas):
+        self.nombre, self.tiempos, self.llamadas = nombre, tiempos, llamadas
+
+    def __enter__(self):
+        self._t = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.tiempos[self.nombre] += time.perf_counter() - self._t
+        self.llamadas[self.nombre] += 1
+
+
+class Instrumentacion:
+    """
+    Contadores de bajo costo para simulacion.run (opt-in: run(..., instrumentacion=Instrumentacion())):
+        - Tiempo y número de llamadas por fase: selección de acción, transición/reward,
+          actualización Q, experience replay, snapshots, logging, checkpoints y ploteo
+        - Pasos por episodio y tamaño de la Q-tabla cada 'tamano_cada' episodios
+        - Perfilado (cProfile por defecto) de los episodios indicados en 'perfilar_episodios'.
+          'perfilador' permite usar otro perfilador: una función que retorna un objeto con
+          los métodos enable() y disable()
+    Sin instrumentación, run() usa su paso sin mediciones y no tiene costo adicional por paso.
+    """
+
+    def __init__(self, perfilar_episodios=(), perfilador=cProfile.Profile, tamano_cada: int = 100):
+        self.perfilar_episodios = set(perfilar_episodios)
+        self.perfilador = perfilador
+        self.tamano_cada = tamano_cada
+
+        fases = FASES_PASO + FASES_REPLAY + FASES_EPISODIO
+        self.tiempos = dict.fromkeys(fases, 0.0)
+        self.llamadas = dict.fromkeys(fases, 0)
+        self._fases = {f: _Fase(f, self.tiempos, self.llamadas) for f in fases}
+        self.pasos_episodio = []
+        self.tamano_Qtabla = []  # (episodio, entradas en la Q-tabla)
+        self.perfiles = {}  # episodio -> perfilador
+        self.tiempo_total = 0.0
+        self._perfil_actual = None
+
+    # Interfaz usada por run() ----------------------------------------------------------------
+    def fase(self, nombre: str) -> _Fase:
+        return self._fases[nombre]
+
+    def registrar_fase(self, nombre: str, segundos: float) -> None:
+        self.tiempos[nombre] += segundos
+        self.llamadas[nombre] += 1
+
+    def acumular_paso(self, t_accion: float, t_transicion: float, t_actualizacion: float) -> None:
+        tiempos = self.tiempos
+        tiempos["accion"] += t_accion
+        tiempos["transicion"] += t_transicion
+        tiempos["actualizacion_Q"] += t_actualizacion
+
+    def inicio_episodio(self, episodio: int) -> None:
+        if episodio in self.perfilar_episodios:
+            self._perfil_actual = self.perfiles[episodio] = self.perfilador()
+            self._perfil_actual.enable()
+
+    def fin_episodio(self, episodio: int, pasos: int, agente) -> None:
+        if self._perfil_actual is not None:
+            self._perfil_actual.disable()
+            self._perfil_actual = None
+        for f in FASES_PASO:
+            self.llamadas[f] += pasos
+        self.pasos_episodio.append(pasos)
+        if episodio % self.tamano_cada == 0:
+            self.tamano_Qtabla.append((episodio, len(agente.Qtabla)))
+
+    def finalizar(self, tiempo_total: float) -> None:
+        self.tiempo_total = tiempo_total
+
+    # Reporte --------------------------------------------------------------------------------
+    def reporte(self) -> Dict:
+        pasos = np.asarray(self.pasos_episodio)
+        fases = {}
+        for f, t in self.tiempos.items():
+            n = self.llamadas[f]
+            fases[f] = {
+                "segundos": t,
+                "llamadas": n,
+                "us_por_llamada": 1e6 * t / n if n else 0.0,
+                "porcentaje": 100 * t / self.tiempo_total if self.tiempo_total else 0.0,
+            }
+        return {
+            "tiempo_total": self.tiempo_total,
+            "fases": fases,
+            "episodios": len(pasos),
+            "pasos_totales": int(pasos.sum()),
+            "pasos_medios": float(pasos.mean()) if len(pasos) else 0.0,
+            "pasos_max": int(pasos.max()) if len(pasos) else 0,
+            "tamano_Qtabla": list(self.tamano_Qtabla),
+            "episodios_perfilados": sorted(self.perfiles),
+        }
+
+    def imprimir_reporte(self, lineas_perfil: int = 15) -> None:
+        r = self.reporte()
+        print(f"\nInstrumentación: {r['episodios']} episodios, {r['pasos_totales']} pasos, "
+              f"{r['tiempo_total']:.4f} segundos")
+        print(f"{'fase':<18}{'segundos':>12}{'llamadas':>12}{'us/llamada':>12}{'%':>8}")
+        for f, d in r["fases"].items():
+            print(f"{f:<18}{d['segundos']:>12.4f}{d['llamadas']:>12}{d['us_por_llamada']:>12.3f}{d['porcentaje']:>8.1f}")
+        print(f"Pasos por episodio: medio {r['pasos_medios']:.1f}, máximo {r['pasos_max']}")
+        if r["tamano_Qtabla"]:
+            print(f"Tamaño de la Q-tabla (episodio, entradas): {r['tamano_Qtabla'][-1]}")
+        for episodio, perfil in self.perfiles.items():
+            if isinstance(perfil, cProfile.Profile):
+                salida = io.StringIO()
+                pstats.Stats(perfil, stream=salida).sort_stats("cumulative").print_stats(lineas_perfil)
+                print(f"\nPerfil del episodio {episodio}:\n{salida.getvalue()}")
@@ -6,6 +6,8 @@ from tablero import Tablero
 from agente import AgenteQLearning
 from simulacion import run
 from helpers import leer_tablero, guardar_Qtabla, cargar_Qtabla
+from evaluacion import evaluar_politica, RESULTADOS
+from convergencia import CriterioConvergencia
 
 ## Tablero para el proyecto ===============================================
 rodaderos, escaleras, perdida, victoria = leer_tablero('./tablero')
@@ -23,19 +25,25 @@ tab = Tablero(
 agente = AgenteQLearning(tab, alpha=0.5, epsilon=0.5, gamma=1)
 
 # Run
-reward_historico, Qtabla = run(
+resultados, Qtabla = run(
     tab, agente, episodios=20000,
     epsilon_ciclos=5, # Número de ciclos de oscilación para epsilon
     print_Qvalores_politica=True, animacion=False,
+    # Detener el entrenamiento si la política greedy no cambia en 20 verificaciones (2000 episodios)
+    convergencia=CriterioConvergencia(cada=100, politica_estable=20),
 )
-guardar_Qtabla("Qtabla.npy", Qtabla)
+guardar_Qtabla("Qtabla.npz", Qtabla, tab)
+resumen = resultados.resumen(ventana=1000)
+print(f"\nÚltimos {resumen['episodios']} episodios: victorias {100 * resumen['tasa_victoria']:.1f}%, "
+      f"pasos medios {resumen['pasos_medios']:.1f}, reward medio {resumen['reward_medio']:.2f}")
 
-# Bootstrapping con un segundo agente =====================================
-print("\nBootstrapping:")
-Qtabla_bootstrap = cargar_Qtabla("Qtabla.npy")
-agente2 = AgenteQLearning(tab, alpha=0.5, epsilon=0, gamma=1)
-agente2.Qtabla = Qtabla_bootstrap
-_, _ = run(
-    tab, agente2, episodios=1,
-    print_Qvalores_politica=True, animacion=False
-)
+# Evaluación de la política greedy de la Q-tabla guardada (sin modificarla) ===
+print("\nEvaluación:")
+Qtabla_guardada = cargar_Qtabla("Qtabla.npz", tab)
+desde_inicio = evaluar_politica(tab, Qtabla_guardada, estados_iniciales=[1])
+print(f"Desde la celda 1: {RESULTADOS[desde_inicio['resultado'][0]]} en {desde_inicio['pasos'][0]} pasos, "
+      f"con reward {desde_inicio['retorno'][0]}")
+todos = evaluar_politica(tab, Qtabla_guardada)
+print(f"Desde todos los estados no terminales: victorias {100 * todos['tasa_victoria']:.1f}%, "
+      f"pérdidas {100 * todos['tasa_perdida']:.1f}%, ciclos {100 * todos['tasa_ciclo']:.1f}%, "
+      f"pasos medios {todos['pasos_medios']:.1f}")
@@ -20,14 +20,14 @@ tab = Tablero(
 agente = AgenteQLearning(tab, alpha=0.35, epsilon=0.75, gamma=1)
 
 # Run
-reward_historico, Qtabla = run(
+resultados, Qtabla = run(
     tab, agente, episodios=150,
     epsilon_ciclos=5,
     print_Qvalores_politica=True, animacion=True
 )
 
 ## Corer por más episodios ===============================================
-reward_historico, Qtabla = run(
+resultados, Qtabla = run(
     tab, agente, episodios=1000,
     epsilon_ciclos=5,
     print_Qvalores_politica=True, animacion=False
@@ -0,0 +1,142 @@
+from typing import Dict
+import heapq
+import numpy as np
+from tablero import Tablero, INDICE_ACCION
+from agente import AgenteQLearning
+
+
+class AgenteBarridoPriorizado(AgenteQLearning):
+    """
+    Q-learning con planificación por barrido priorizado (prioritized sweeping, Sutton & Barto, sección 8.4).
+    Después de cada actualización real, el agente hace hasta 'pasos_planificacion' actualizaciones
+    simuladas con el modelo, en orden de prioridad (error de Bellman |R + γ*maxₐ Q(S',a) - Q(S,A)|):
+        - Al cambiar Q(S,·), se encolan los predecesores (S̄,Ā) de S con su error de Bellman si supera 'theta'
+        - La cola es un heap (heapq) con a lo más una entrada vigente por par (las obsoletas se descartan)
+    Modelo (las dinámicas del tablero son deterministas):
+        - modelo="tablero": se lee de tablero.siguiente_estado / reward_celda, con el índice de
+          predecesores precalculado (todas las transiciones se conocen desde el inicio)
+        - modelo="aprendido": se construye solo con las transiciones observadas
+    Como el modelo es determinista, las actualizaciones simuladas usan 'alpha_planificacion' (1 por
+    defecto: el Q del par toma directamente el valor del objetivo); las reales usan 'alpha'.
+    El costo por paso real está acotado por pasos_planificacion * (predecesores por estado). Requiere tabla densa.
+    """
+
+    def __init__(
+        self, tablero: Tablero, alpha=0.5, epsilon=0.65, gamma=0.9, tabla_densa=True, semilla=None,
+        pasos_planificacion: int = 10, theta: float = 1e-4, modelo: str = "tablero",
+        alpha_planificacion: float = 1.0,
+    ):
+        if not tabla_densa:
+            raise ValueError(f"{type(self).__name__} requiere tabla_densa=True")
+        if tablero.estocastico:
+            raise ValueError(f"{type(self).__name__} requiere un tablero con transiciones deterministas")
+        if modelo not in ("tablero", "aprendido"):
+            raise ValueError(f"modelo debe ser 'tablero' o 'aprendido', no {modelo!r}")
+        super().__init__(tablero, alpha, epsilon, gamma, tabla_densa, semilla)
+        self.pasos_planificacion = pasos_planificacion
+        self.alpha_planificacion = alpha_planificacion
+        self.theta = theta
+        self.modelo = modelo
+        self.nro_acciones = tablero.acciones_validas.shape[1]
+
+        # Modelo por par (estado, acción) como índice plano 'fila * nro_acciones + columna'
+        # de la Q-tabla densa: estado siguiente (0 = desconocido) y reward
+        n_pares = tablero.celda_max * self.nro_acciones
+        if modelo == "tablero":
+            self.modelo_siguiente = tablero.siguiente_estado[1:].reshape(-1).copy()
+            self.modelo_siguiente[~tablero.acciones_validas[1:].reshape(-1)] = 0
+            self.modelo_siguiente[np.repeat(tablero.terminal[1:], self.nro_acciones)] = 0
+            self.modelo_reward = tablero.reward_celda[self.modelo_siguiente]
+        else:
+            self.modelo_siguiente = np.zeros(n_pares, dtype=np.int64)
+            self.modelo_reward = np.zeros(n_pares)
+        self._indexar_predecesores()
+
+        # Cola de prioridad: entradas (-prioridad, par) y prioridad vigente de cada par encolado
+        self.cola = []
+        self.en_cola = {}
+
+    def _indexar_predecesores(self) -> None:
+        """
+        Predecesores de cada estado según el modelo: pares (S̄,Ā) con modelo_siguiente = S
+        """
+        conocidos = np.flatnonzero(self.modelo_siguiente)
+        destinos = self.modelo_siguiente[conocidos]
+        orden = np.argsort(destinos, kind="stable")
+        self._pred_pares = conocidos[orden]
+        self._pred_inicio = np.searchsorted(destinos[orden], np.arange(self.tablero.celda_max + 2))
+        # Predecesores agregados después de indexar (modelo aprendido)
+        self._pred_nuevos = {}
+
+    def predecesores(self, estado) -> list:
+        pares = self._pred_pares[self._pred_inicio[estado]:self._pred_inicio[estado + 1]].tolist()
+        return pares + self._pred_nuevos.get(estado, [])
+
+    # Checkpoints: modelo aprendido y cola de prioridad -----------------------------------
+    def estado_extra(self) -> Dict[str, np.ndarray]:
+        prioridades, pares = zip(*self.cola) if self.cola else ((), ())
+        return {
+            "modelo_siguiente": self.modelo_siguiente,
+            "modelo_reward": self.modelo_reward,
+            "cola_prioridad": np.array(prioridades, dtype=np.float64),
+            "cola_par": np.array(pares, dtype=np.int64),
+            "en_cola_par": np.array(list(self.en_cola), dtype=np.int64),
+            "en_cola_prioridad": np.array(list(self.en_cola.values()), dtype=np.float64),
+        }
+
+    def restaurar_estado_extra(self, arrays: Dict[str, np.ndarray]) -> None:
+        self.modelo_siguiente = np.array(arrays["modelo_siguiente"], dtype=np.int64)
+        self.modelo_reward = np.array(arrays["modelo_reward"], dtype=np.float64)
+        self._indexar_predecesores()
+        self.cola = list(zip(arrays["cola_prioridad"].tolist(), arrays["cola_par"].tolist()))
+        self.en_cola = dict(zip(arrays["en_cola_par"].tolist(), arrays["en_cola_prioridad"].tolist()))
+
+    # Actualización real + planificación --------------------------------------------------
+    def _encolar(self, par: int, prioridad: float) -> None:
+        if prioridad > self.theta and prioridad > self.en_cola.get(par, 0.0):
+            self.en_cola[par] = prioridad
+            heapq.heappush(self.cola, (-prioridad, par))
+
+    def _encolar_predecesores(self, estado) -> None:
+        Q = self._Qtabla.Q.reshape(-1)
+        V = max(self.Q_estado(estado))
+        for par in self.predecesores(estado):
+            self._encolar(par, abs(self.modelo_reward.item(par) + self.gamma * V - Q.item(par)))
+
+    def actualizar_Q(self, estado, accion, reward, estado_siguiente) -> None:
+        super().actualizar_Q(estado, accion, reward, estado_siguiente)
+
+        # Modelo aprendido: registrar la transición observada
+        par = (estado - 1) * self.nro_acciones + INDICE_ACCION[accion]
+        if self.modelo_siguiente.item(par) == 0:
+            self.modelo_siguiente[par] = estado_siguiente
+            self.modelo_reward[par] = reward
+            self._pred_nuevos.setdefault(estado_siguiente, []).append(par)
+
+        # Q(estado,·) cambió: sus predecesores pueden tener un error de Bellman mayor
+        self._encolar_predecesores(estado)
+        self.planificar(self.pasos_planificacion)
+
+    def planificar(self, pasos: int) -> int:
+        """
+        Hasta 'pasos' actualizaciones simuladas en orden de prioridad. Retorna las realizadas
+        """
+        tabla = self._Qtabla
+        Q = tabla.Q.reshape(-1)
+        visitado = tabla.visitado.reshape(-1)
+        realizados = 0
+        while realizados < pasos and self.cola:
+            menos_prioridad, par = heapq.heappop(self.cola)
+            if self.en_cola.get(par) != -menos_prioridad:
+                continue  # Entrada obsoleta (el par se volvió a encolar con otra prioridad)
+            del self.en_cola[par]
+
+            estado = par // self.nro_acciones + 1
+            estado_siguiente = self.modelo_siguiente.item(par)
+            objetivo = self.modelo_reward.item(par) + self.gamma * max(self.Q_estado(estado_siguiente))
+            Q_actual = Q.item(par)
+            Q[par] = Q_actual + self.alpha_planificacion * (objetivo - Q_actual)
+            visitado[par] = True
+            realizados += 1
+            self._encolar_predecesores(estado)
+        return realizados
@@ -0,0 +1,117 @@
+from typing import Tuple
+from tablero import Tablero, ACCIONES, INDICE_ACCION
+from agente import grilla_Qmax_politica
+import numpy as np
+
+
+def _objetivo(tablero: Tablero, V: np.ndarray, gamma: float) -> np.ndarray:
+    """
+    R(s') + γ*V(s') para cada celda s' (V(s') = 0 si s' es terminal)
+    """
+    return tablero.reward_celda + gamma * np.where(tablero.terminal, 0.0, V)
+
+
+def _backup_Q(tablero: Tablero, V: np.ndarray, gamma: float) -> np.ndarray:
+    """
+    Backup de Bellman esperado para todas las parejas (estado, acción) a la vez:
+        Q(s,a) = Σ P(s'|s,a) * (R(s') + γ*V(s')),  con V(s') = 0 si s' es terminal
+    La suma sobre s' la calcula tablero.esperanza (indexación con siguiente_estado en Tablero,
+    producto matriz-vector disperso en TableroEstocastico).
+    Retorna un array (celda_max, nro_acciones) con -inf en acciones no válidas y 0 en la
+    acción (None) de los estados terminales.
+    """
+    Q = tablero.esperanza(_objetivo(tablero, V, gamma))[1:]
+    Q[tablero.terminal[1:]] = 0.0
+    Q[~tablero.acciones_validas[1:]] = -np.inf
+    return Q
+
+
+def iteracion_valor(
+    tablero: Tablero, gamma: float = 0.9, tol: float = 1e-8, max_iter: int = 100_000
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Value iteration sobre las tablas precalculadas del tablero (Sutton & Barto, p. 83).
+    Con TableroEstocastico los backups son esperados sobre la matriz P[s, a, s'].
+    Retorna:
+        - V: array (celda_max,) con el valor óptimo de cada estado
+        - Q: array (celda_max, nro_acciones) con el mismo formato que QTablaDensa.Q
+        - politica: array (celda_max,) con el índice (ver INDICE_ACCION) de la acción greedy
+    """
+    # V indexado por número de celda (índice 0 sin uso)
+    V = np.zeros(tablero.celda_max + 1)
+    for _ in range(max_iter):
+        Q = _backup_Q(tablero, V, gamma)
+        V_nuevo = np.concatenate(([0.0], Q.max(axis=1)))
+        delta = np.max(np.abs(V_nuevo - V))
+        V = V_nuevo
+        if delta < tol:
+            break
+    Q = _backup_Q(tablero, V, gamma)
+    return V[1:], Q, Q.argmax(axis=1)
+
+
+def iteracion_politica(
+    tablero: Tablero, gamma: float = 0.9, tol: float = 1e-8,
+    max_iter: int = 1_000, max_iter_evaluacion: int = 100_000
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Policy iteration (Sutton & Barto, p. 80). La evaluación de cada política es iterativa y
+    vectorizada; con γ = 1 una política que no termina se detiene en 'max_iter_evaluacion'
+    iteraciones y la mejora de política se encarga de descartarla.
+    Retorna (V, Q, politica) con el mismo formato que iteracion_valor.
+    """
+    celdas = np.arange(1, tablero.celda_max + 1)
+    terminal = tablero.terminal
+    # Política inicial: avanzar donde se pueda, o la única acción válida
+    validas = tablero.acciones_validas[1:]
+    politica = np.where(validas[:, INDICE_ACCION[1]], INDICE_ACCION[1], validas.argmax(axis=1))
+
+    V = np.zeros(tablero.celda_max + 1)
+    for _ in range(max_iter):
+        # Evaluación de la política actual: backup esperado con la matriz de transición de la
+        # política (formato COO, ver Tablero.sucesores), armada una sola vez por política
+        origen, siguientes, probabilidad = tablero.sucesores(celdas, politica)
+        rewards = np.bincount(origen, weights=probabilidad * tablero.reward_celda[siguientes], minlength=len(celdas))
+        rewards[terminal[celdas]] = 0.0
+        continua = np.where(terminal[celdas[origen]] | terminal[siguientes], 0.0, probabilidad)
+        for _ in range(max_iter_evaluacion):
+            V_politica = rewards + gamma * np.bincount(origen, weights=continua * V[siguientes], minlength=len(celdas))
+            V_nuevo = np.concatenate(([0.0], V_politica))
+            delta = np.max(np.abs(V_nuevo - V))
+            V = V_nuevo
+            if delta < tol:
+                break
+
+        # Mejora de la política (se mantiene la acción actual en caso de empate)
+        Q = _backup_Q(tablero, V, gamma)
+        Q_actual = Q[celdas - 1, politica]
+        nueva = np.where(Q_actual >= Q.max(axis=1), politica, Q.argmax(axis=1))
+        if np.array_equal(nueva, politica):
+            break
+        politica = nueva
+
+    return V[1:], Q, politica
+
+
+def grilla_solucion(tablero: Tablero, Q: np.ndarray, politica: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Grillas de Q-valor máximo y de política con el mismo formato que
+    AgenteQLearning.obtener_Qmax_politica (los estados terminales quedan vacíos)
+    """
+    estados = np.flatnonzero(~tablero.terminal[1:])
+    return grilla_Qmax_politica(tablero, estados + 1, Q[estados, politica[estados]], politica[estados])
+
+
+def inicializar_agente(agente, Q: np.ndarray) -> None:
+    """
+    Warm-start: copia a la Q-tabla del agente los Q-valores de todas las acciones válidas
+    de los estados no terminales (funciona con tabla densa o diccionario)
+    """
+    tablero = agente.tablero
+    pares = tablero.acciones_validas[1:] & ~tablero.terminal[1:, None]
+    if agente.tabla_densa:
+        agente.Qtabla.Q[pares] = Q[pares]
+        agente.Qtabla.visitado |= pares
+        return
+    for s, a in zip(*np.nonzero(pares)):
+        agente.Qtabla[(int(s) + 1, ACCIONES[a])] = float(Q[s, a])
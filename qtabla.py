@@ -0,0 +1,64 @@
+from collections.abc import MutableMapping
+from tablero import ACCIONES, INDICE_ACCION
+import numpy as np
+
+
+class QTablaDensa(MutableMapping):
+    """
+    Q-tabla respaldada por un array de Numpy con forma (celda_max, nro_acciones).
+        - La fila 'estado - 1' contiene los Q-valores del estado
+        - La columna de cada acción está dada por INDICE_ACCION (orden fijo de ACCIONES)
+
+    Se comporta como el diccionario (estado, acción) -> Q que usa AgenteQLearning, de modo que
+    max_Q_values, obtener_Qmax_politica y guardar_Qtabla funcionan sin cambios. Solo los pares
+    (estado, acción) actualizados al menos una vez forman parte de la vista de diccionario.
+    """
+
+    def __init__(self, validas: np.ndarray, Q: np.ndarray = None):
+        # Mask de acciones válidas por estado
+        self.validas = validas
+        # Q-valores (0 por defecto, igual que el diccionario con .get(..., 0))
+        self.Q = np.zeros(validas.shape) if Q is None else Q
+        # Pares (estado, acción) que ya existen en la vista de diccionario
+        self.visitado = np.zeros(validas.shape, dtype=bool)
+
+    # Vista de diccionario: (estado, acción) -> Q --------------------------------------
+    def __getitem__(self, clave):
+        estado, accion = clave
+        i = INDICE_ACCION[accion]
+        if not self.visitado[estado - 1, i]:
+            raise KeyError(clave)
+        return self.Q.item(estado - 1, i)
+
+    def __setitem__(self, clave, valor):
+        estado, accion = clave
+        i = INDICE_ACCION[accion]
+        self.Q[estado - 1, i] = valor
+        self.visitado[estado - 1, i] = True
+
+    def __delitem__(self, clave):
+        estado, accion = clave
+        i = INDICE_ACCION[accion]
+        if not self.visitado[estado - 1, i]:
+            raise KeyError(clave)
+        self.Q[estado - 1, i] = 0.0
+        self.visitado[estado - 1, i] = False
+
+    def __iter__(self):
+        filas, columnas = np.nonzero(self.visitado)
+        for fila, col in zip(filas.tolist(), columnas.tolist()):
+            yield fila + 1, ACCIONES[col]
+
+    def __len__(self):
+        return int(np.count_nonzero(self.visitado))
+
+    def get(self, clave, default=None):
+        # Versión directa (sin try/except) del .get de Mapping
+        estado, accion = clave
+        i = INDICE_ACCION[accion]
+        if self.visitado[estado - 1, i]:
+            return self.Q.item(estado - 1, i)
+        return default
+
+    def a_dict(self) -> dict:
+        return dict(self.items())
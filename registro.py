@@ -0,0 +1,122 @@
+import json
+import os
+from historial import ResultadosRun
+
+# Niveles de verbosidad
+SILENCIO = 0  # Sin salida por consola
+RESUMEN = 1  # Un resumen cada 'cada' episodios y el tiempo total (por defecto)
+EPISODIO = 2  # Una línea por episodio (comportamiento original de run, opt-in)
+
+CAMPOS = ("episodio", "victoria", "pasos", "reward", "epsilon")
+
+
+class Registro:
+    """
+    Logging del entrenamiento para simulacion.run:
+        - Salida por consola según el nivel de verbosidad
+        - Resumen cada 'cada' episodios con las medias móviles (ventana) de reward y pasos
+        - Sink estructurado opcional (JSON lines o CSV, según la extensión de 'path'),
+          escrito en bloques de 'tam_buffer' episodios y en cada checkpoint de run()
+    Los resúmenes se calculan sobre el historial de run() (ResultadosRun), sin una copia propia: con
+    verbosidad SILENCIO/RESUMEN y sin sink, registrar un episodio no cuesta nada más.
+    """
+
+    def __init__(self, verbosidad=RESUMEN, cada=1000, ventana=100, path=None, tam_buffer=1000):
+        self.verbosidad = verbosidad
+        self.cada = cada
+        self.ventana = ventana
+        self.path = path
+        self.formato = "csv" if path is not None and path.endswith(".csv") else "jsonl"
+        self.tam_buffer = tam_buffer
+        self._buffer = []
+        self._archivo = None
+
+    def iniciar(self, resultados: ResultadosRun) -> None:
+        """
+        Toma el historial de run() (cada episodio se registra en 'resultados' antes de llamar a
+        registrar_episodio) y abre el sink (si existe). Si 'resultados' ya contiene episodios (reanudación
+        desde un checkpoint), el sink se recorta a esos episodios (las filas escritas después del
+        checkpoint se vuelven a generar) y se abre para agregar al final.
+        """
+        self.resultados = resultados
+        if self.path is not None:
+            if len(resultados) and os.path.exists(self.path):
+                self._recortar(len(resultados))
+                self._archivo = open(self.path, "a")
+            else:
+                self._archivo = open(self.path, "w")
+                if self.formato == "csv":
+                    self._archivo.write(",".join(CAMPOS) + "\n")
+
+    def registrar_episodio(self, episodio: int, victoria: bool, pasos: int, reward: float, epsilon: float) -> None:
+        if self.verbosidad >= EPISODIO:
+            print(f"Episodio {episodio} ({'✅' if victoria else '❌'}) terminó en {pasos} pasos, con reward {reward}.")
+        elif self.verbosidad >= RESUMEN and episodio % self.cada == 0:
+            self.resumen(episodio)
+
+        if self._archivo is not None:
+            self._buffer.append((episodio, victoria, pasos, reward, epsilon))
+            if len(self._buffer) >= self.tam_buffer:
+                self._escribir_buffer()
+
+    def resumen(self, episodio: int) -> None:
+        """
+        Imprime las medias móviles de los últimos 'ventana' episodios
+        """
+        resumen = self.resultados.resumen(self.ventana)
+        print(
+            f"Episodio {episodio}: "
+            f"victorias {100 * resumen['tasa_victoria']:.1f}%, "
+            f"pasos medios {resumen['pasos_medios']:.1f}, "
+            f"reward medio {resumen['reward_medio']:.2f} "
+            f"(últimos {resumen['episodios']} episodios)"
+        )
+
+    def sincronizar(self) -> None:
+        """
+        Escribe lo pendiente en el sink (antes de cada checkpoint, para que el sink cubra al menos
+        los episodios guardados en él)
+        """
+        if self._archivo is not None:
+            self._escribir_buffer()
+            self._archivo.flush()
+
+    def registrar_convergencia(self, episodio: int, motivo: str) -> None:
+        """
+        Reporta la parada temprana del entrenamiento (ver convergencia.CriterioConvergencia)
+        """
+        if self.verbosidad >= RESUMEN:
+            print(f"Convergencia en el episodio {episodio}: {motivo}")
+
+    def finalizar(self, segundos: float) -> None:
+        """
+        Escribe lo pendiente en el sink, lo cierra y reporta el tiempo total
+        """
+        if self._archivo is not None:
+            self._escribir_buffer()
+            self._archivo.close()
+            self._archivo = None
+        if self.verbosidad >= RESUMEN:
+            print(f"Completado en {segundos:.4f} segundos")
+
+    def _escribir_buffer(self) -> None:
+        if self.formato == "csv":
+            lineas = [f"{e},{int(v)},{p},{r},{eps}\n" for e, v, p, r, eps in self._buffer]
+        else:
+            lineas = [json.dumps(dict(zip(CAMPOS, fila))) + "\n" for fila in self._buffer]
+        self._archivo.writelines(lineas)
+        self._buffer.clear()
+
+    def _recortar(self, episodio: int) -> None:
+        """
+        Elimina del sink las filas posteriores a 'episodio' (las filas están en orden de episodio)
+        """
+        with open(self.path, "rb+") as archivo:
+            fin = 0
+            for linea in archivo:
+                if linea.strip() and not linea.startswith(b"episodio"):
+                    e = int(linea.split(b",", 1)[0]) if self.formato == "csv" else json.loads(linea)["episodio"]
+                    if e > episodio:
+                        break
+                fin += len(linea)
+            archivo.truncate(fin)
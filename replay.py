@@ -0,0 +1,231 @@
+from typing import Dict
+import json
+import numpy as np
+from tablero import Tablero, INDICE_ACCION
+from agente import AgenteDobleQ, AgenteQLambda
+
+
+class BufferReplay:
+    """
+    Ring buffer de transiciones (s, a, r, s') en arrays de Numpy preasignados de tamaño 'capacidad'
+    (la acción se guarda como índice de INDICE_ACCION). Al llenarse se sobrescriben las más antiguas.
+
+    Con priorizado=True (Schaul et al., 2016, variante proporcional) cada transición tiene prioridad
+    pᵢ = (|δᵢ| + eps_prioridad) ** alpha_prioridad guardada en un sum-tree (array de 2 * hojas): muestrear
+    y actualizar un lote de B transiciones cuesta O(B log capacidad) con operaciones vectorizadas.
+    Las transiciones nuevas entran con la prioridad máxima vista para que se muestreen al menos una vez.
+    """
+
+    def __init__(self, capacidad: int, priorizado: bool = False, alpha_prioridad: float = 0.6, eps_prioridad: float = 1e-3):
+        self.capacidad = capacidad
+        self.estados = np.zeros(capacidad, dtype=np.int64)
+        self.acciones = np.zeros(capacidad, dtype=np.int8)
+        self.rewards = np.zeros(capacidad)
+        self.siguientes = np.zeros(capacidad, dtype=np.int64)
+        self.n = 0  # Transiciones guardadas (como máximo 'capacidad')
+        self._i = 0  # Próxima posición a escribir
+
+        self.priorizado = priorizado
+        self.alpha_prioridad = alpha_prioridad
+        self.eps_prioridad = eps_prioridad
+        if priorizado:
+            # Sum-tree: hojas en [hojas, 2 * hojas), nodo k = suma de sus hijos 2k y 2k + 1 (raíz en 1)
+            self._niveles = max(0, (capacidad - 1).bit_length())
+            self._hojas = 1 << self._niveles
+            self._arbol = np.zeros(2 * self._hojas)
+            self._prioridad_max = 1.0
+
+    def __len__(self) -> int:
+        return self.n
+
+    def agregar(self, estado: int, accion: int, reward: float, estado_siguiente: int) -> None:
+        i = self._i
+        self.estados[i] = estado
+        self.acciones[i] = accion
+        self.rewards[i] = reward
+        self.siguientes[i] = estado_siguiente
+        self._i = (i + 1) % self.capacidad
+        self.n = min(self.n + 1, self.capacidad)
+        if self.priorizado:
+            # Una sola hoja: recorrido escalar hasta la raíz
+            arbol = self._arbol
+            nodo = i + self._hojas
+            arbol[nodo] = self._prioridad_max
+            nodo //= 2
+            while nodo:
+                arbol[nodo] = arbol.item(2 * nodo) + arbol.item(2 * nodo + 1)
+                nodo //= 2
+
+    def muestrear(self, tamano_lote: int, rng: np.random.Generator):
+        """
+        Retorna (índices, P(i)): índices de 'tamano_lote' transiciones (con reemplazo, estratificadas
+        si es priorizado) y la probabilidad de muestreo de cada una
+        """
+        if not self.priorizado:
+            return rng.integers(0, self.n, tamano_lote), np.full(tamano_lote, 1.0 / self.n)
+        # Descenso vectorizado por el sum-tree desde la raíz: un valor uniforme por estrato
+        total = self._arbol[1]
+        valores = (np.arange(tamano_lote) + rng.random(tamano_lote)) * (total / tamano_lote)
+        nodos = np.ones(tamano_lote, dtype=np.int64)
+        for _ in range(self._niveles):
+            nodos <<= 1
+            suma_izq = self._arbol[nodos]
+            derecha = valores >= suma_izq
+            valores -= suma_izq * derecha
+            nodos += derecha
+        indices = np.minimum(nodos - self._hojas, self.n - 1)
+        return indices, self._arbol[indices + self._hojas] / total
+
+    def pesos(self, probabilidades: np.ndarray, beta: float) -> np.ndarray:
+        """
+        Pesos de importance sampling normalizados: wᵢ = (n * P(i)) ** -beta / max w
+        """
+        pesos = (self.n * np.maximum(probabilidades, 1e-12)) ** -beta
+        return pesos / pesos.max()
+
+    def actualizar_prioridades(self, indices: np.ndarray, errores: np.ndarray) -> None:
+        prioridades = (np.abs(errores) + self.eps_prioridad) ** self.alpha_prioridad
+        self._prioridad_max = max(self._prioridad_max, float(prioridades.max()))
+        self._fijar_prioridades(indices, prioridades)
+
+    def _fijar_prioridades(self, indices: np.ndarray, prioridades: np.ndarray) -> None:
+        nodos = indices + self._hojas
+        self._arbol[nodos] = prioridades
+        # Recalcular las sumas nivel por nivel (solo los ancestros de las hojas modificadas; los
+        # ancestros repetidos se escriben más de una vez con el mismo valor)
+        arbol = self._arbol
+        for _ in range(self._niveles):
+            nodos >>= 1
+            izquierdo = nodos << 1
+            arbol[nodos] = arbol[izquierdo] + arbol[izquierdo + 1]
+
+
+class Replay:
+    """
+    Experience replay opcional para simulacion.run (run(..., replay=Replay(tablero))): cada transición
+    real se guarda en un BufferReplay y cada 'cada' pasos (una vez que hay 'inicio' transiciones) se
+    aplica un lote de 'tamano_lote' actualizaciones Q-learning vectorizadas sobre la Q-tabla densa:
+        δᵢ = rᵢ + γ*maxₐ Q(s'ᵢ, a) - Q(sᵢ, aᵢ),   Q(sᵢ, aᵢ) += α * wᵢ * δᵢ
+    con maxₐ Q(s', a) = 0 en estados terminales. Todos los δ del lote se calculan con la Q-tabla previa
+    al lote; si un par se repite en el lote se aplica el promedio de sus wᵢ * δᵢ.
+
+    Con priorizado=True se muestrea en proporción a |δ| ** alpha_prioridad y los pesos wᵢ corrigen
+    el sesgo con un exponente beta que crece linealmente de 'beta' a 1 en 'pasos_beta' lotes.
+
+    Usa el objetivo de Q-learning sobre agente.Qtabla.Q, por lo que requiere un agente de tabla densa
+    cuya única estimación sea esa Q-tabla (AgenteDobleQ y AgenteQLambda no lo son, ver validar);
+    alpha=None usa el alpha del agente. El buffer, su generador y sus contadores se guardan en los
+    checkpoints de run() (estado / restaurar), por lo que la reanudación sigue siendo exacta.
+    """
+
+    def __init__(
+        self,
+        tablero: Tablero,
+        capacidad: int = 100_000,
+        tamano_lote: int = 32,
+        cada: int = 1,
+        inicio: int = 1_000,
+        priorizado: bool = False,
+        alpha_prioridad: float = 0.6,
+        beta: float = 0.4,
+        pasos_beta: int = 100_000,
+        alpha: float = None,
+        semilla=None,
+    ):
+        self.tablero = tablero
+        self.buffer = BufferReplay(capacidad, priorizado, alpha_prioridad)
+        self.tamano_lote = tamano_lote
+        self.cada = cada
+        self.inicio = max(inicio, 1)
+        self.beta_inicial = beta
+        self.pasos_beta = pasos_beta
+        self.alpha = alpha
+        self.rng = np.random.default_rng(semilla)
+        # Mask de acciones no válidas y de estados terminales, indexados por 'estado - 1' (como QTablaDensa.Q)
+        self._no_validas = ~tablero.acciones_validas[1:]
+        self._terminal = tablero.terminal[1:]
+        self.pasos = 0
+        self.lotes = 0
+
+    def validar(self, agente) -> None:
+        """
+        Verifica antes de entrenar (run() la llama al inicio) que el replay pueda actualizar al agente
+        """
+        if not agente.tabla_densa:
+            raise ValueError("Replay requiere un agente con tabla_densa=True")
+        if isinstance(agente, AgenteDobleQ):
+            # Q guarda la media (Q_A + Q_B) / 2: actualizar solo Q movería Q_B = 2*Q - Q_A en 2αδ
+            raise ValueError("Replay no es compatible con AgenteDobleQ (Q_A se guarda aparte de la Q-tabla)")
+        if isinstance(agente, AgenteQLambda):
+            raise ValueError("Replay no es compatible con AgenteQLambda (sus trazas no ven las actualizaciones del replay)")
+
+    def registrar(self, agente, estado, accion, reward, estado_siguiente) -> None:
+        """
+        Guarda la transición real y, si corresponde, aplica un lote de actualizaciones
+        """
+        self.buffer.agregar(estado, INDICE_ACCION[accion], reward, estado_siguiente)
+        self.pasos += 1
+        if self.pasos % self.cada == 0 and len(self.buffer) >= self.inicio:
+            self.actualizar(agente)
+
+    def actualizar(self, agente) -> None:
+        """
+        Un lote de actualizaciones Q-learning vectorizadas sobre agente.Qtabla.Q
+        """
+        buffer = self.buffer
+        indices, probabilidades = buffer.muestrear(self.tamano_lote, self.rng)
+        if buffer.priorizado:
+            beta = self.beta_inicial + (1.0 - self.beta_inicial) * min(1.0, self.lotes / self.pasos_beta)
+            pesos = buffer.pesos(probabilidades, beta)
+        else:
+            pesos = 1.0
+        filas = buffer.estados[indices] - 1
+        columnas = buffer.acciones[indices]
+        siguientes = buffer.siguientes[indices] - 1
+
+        tabla = agente.Qtabla
+        Q = tabla.Q
+        Q_siguiente = np.where(self._no_validas[siguientes], -np.inf, Q[siguientes]).max(axis=1)
+        Q_siguiente[self._terminal[siguientes]] = 0.0
+        errores = buffer.rewards[indices] + agente.gamma * Q_siguiente - Q[filas, columnas]
+
+        # Un par (estado, acción) puede repetirse en el lote: se aplica el promedio de sus deltas
+        # (sumarlos equivaldría a multiplicar alpha por las repeticiones, inestable)
+        alpha = agente.alpha if self.alpha is None else self.alpha
+        tocadas, inverso = np.unique(filas * Q.shape[1] + columnas, return_inverse=True)
+        Q.flat[tocadas] += alpha * np.bincount(inverso, weights=pesos * errores) / np.bincount(inverso)
+        tabla.visitado.flat[tocadas] = True
+        if buffer.priorizado:
+            buffer.actualizar_prioridades(indices, errores)
+        self.lotes += 1
+
+    # Checkpoints ------------------------------------------------------------------------
+    def estado(self) -> Dict[str, np.ndarray]:
+        """
+        Arrays que describen el estado completo del replay (buffer, prioridades, generador y contadores)
+        """
+        buffer = self.buffer
+        arrays = {
+            "estados": buffer.estados, "acciones": buffer.acciones,
+            "rewards": buffer.rewards, "siguientes": buffer.siguientes,
+            "contadores": np.array([buffer.n, buffer._i, self.pasos, self.lotes]),
+            "rng": np.array(json.dumps(self.rng.bit_generator.state)),
+        }
+        if buffer.priorizado:
+            arrays["arbol"] = buffer._arbol
+            arrays["prioridad_max"] = np.array(buffer._prioridad_max)
+        return arrays
+
+    def restaurar(self, arrays: Dict[str, np.ndarray]) -> None:
+        buffer = self.buffer
+        if len(arrays["estados"]) != buffer.capacidad or ("arbol" in arrays) != buffer.priorizado:
+            raise ValueError("La capacidad o el modo (priorizado) del replay no coincide con el del checkpoint")
+        buffer.estados[:] = arrays["estados"]
+        buffer.acciones[:] = arrays["acciones"]
+        buffer.rewards[:] = arrays["rewards"]
+        buffer.siguientes[:] = arrays["siguientes"]
+        buffer.n, buffer._i, self.pasos, self.lotes = (int(c) for c in arrays["contadores"])
+        self.rng.bit_generator.state = json.loads(str(arrays["rng"]))
+        if buffer.priorizado:
+            buffer._arbol[:] = arrays["arbol"]
+            buffer._prioridad_max = float(arrays["prioridad_max"])
@@ -1,8 +1,14 @@
-from typing import Tuple, List, Callable
-from visualizacion import plot_tablero
-import matplotlib.pyplot as plt
+from typing import Tuple, Callable
+from registro import Registro
+from historial import HistorialValores, ResultadosRun, VICTORIA, PERDIDA
+from helpers import guardar_checkpoint, cargar_checkpoint
+from instrumentacion import Instrumentacion, fase_nula
+from convergencia import CriterioConvergencia
+from replay import Replay
+from planificacion import AgenteBarridoPriorizado
 import numpy as np
 import time
+import os
 
 
 def crear_scheduler_oscilante(epsilon_inicial, max_episodios, n_ciclos) -> Callable[[float, int], float]:
@@ -27,11 +33,50 @@ def run(
     epsilon_ciclos=5,
     # Parámetros del reporte de Qvalores, política y animación del entrenamiento
     print_Qvalores_politica=False, animacion=False, interval=100,
+    # Exportar la animación sin ventana (.gif, .mp4 o carpeta de PNGs) con hasta 'max_frames'
+    # snapshots, más la trayectoria completa del episodio final
+    path_animacion: str = None, max_frames: int = 200,
+    # Snapshots de estado-valores (None = uno por episodio con animacion=True, o los necesarios
+    # para 'max_frames' con path_animacion)
+    historial_valores: HistorialValores = None,
     # Otros logs
-    plot_pasos=False
-) -> None:
+    plot_pasos=False,
+    # Logging por consola y/o a archivo (None = Registro(): un resumen cada 1000 episodios;
+    # Registro(verbosidad=EPISODIO) para una línea por episodio)
+    registro: Registro = None,
+    # Checkpoints: archivo, frecuencia (episodios y/o segundos) y reanudación desde el archivo
+    checkpoint: str = None, checkpoint_cada: int = None, checkpoint_segundos: float = None,
+    reanudar: bool = False,
+    # Contadores por fase y perfilado opcional (None = sin instrumentación)
+    instrumentacion: Instrumentacion = None,
+    # Parada temprana (None = siempre se corren todos los episodios)
+    convergencia: CriterioConvergencia = None,
+    # Experience replay (None = cada transición se usa una sola vez)
+    replay: Replay = None,
+) -> Tuple[ResultadosRun, object]:
     """
-    Correr simulación del tablero y entrenamiento del agente.
+    Correr simulación del tablero y entrenamiento del agente (cualquier agente con la interfaz
+    agente.Agente: Q-learning, SARSA, Expected SARSA, Double Q-learning o Q(λ)).
+
+    Con 'checkpoint' se guarda el estado del entrenamiento (Q-tabla, episodio, generador aleatorio del
+    agente, epsilon, historiales y el estado del replay y del criterio de convergencia si se usan) cada
+    'checkpoint_cada' episodios y/o 'checkpoint_segundos' segundos, y al final. Con reanudar=True y un
+    checkpoint existente, el entrenamiento continúa exactamente desde el último episodio guardado (los
+    snapshots de estado-valores solo cubren la parte reanudada; si el checkpoint ya cubre todos los
+    episodios o la parada por convergencia, no se corre ninguno y no hay animación).
+
+    Con 'instrumentacion' se acumulan tiempos por fase, pasos por episodio y tamaño de la Q-tabla;
+    el resumen queda disponible en instrumentacion.reporte().
+
+    Con 'convergencia' el entrenamiento se detiene cuando se cumple el criterio; el episodio y el
+    motivo quedan en convergencia.episodio y convergencia.motivo (los historiales se truncan ahí).
+
+    Con 'replay' cada transición real también se guarda en el buffer y se aplican lotes de
+    actualizaciones vectorizadas sobre la Q-tabla (ver replay.Replay; requiere tabla densa y no admite
+    Double Q-learning ni Q(λ), lo que se verifica antes de empezar).
+
+    Retorna (resultados, Q-tabla del agente): 'resultados' es un historial.ResultadosRun con pasos,
+    reward, epsilon, resultado y segundos de cada episodio corrido.
     """
 
     def step() -> Tuple[int, int, float, int]:
@@ -53,46 +98,149 @@ def run(
 
         return estado, accion, reward, estado_siguiente
 
+    def step_instrumentado() -> Tuple[int, int, float, int]:
+        """
+        Igual que step(), midiendo el tiempo de cada fase
+        """
+        t0 = time.perf_counter()
+        estado = agente.pos
+        accion = agente.escoger_accion(estado)
+        t1 = time.perf_counter()
+        estado_siguiente = tablero.transicion(estado, accion)
+        reward = tablero.reward(estado_siguiente)
+        t2 = time.perf_counter()
+        agente.actualizar_Q(estado, accion, reward, estado_siguiente)
+        agente.pos = estado_siguiente
+        instrumentacion.acumular_paso(t1 - t0, t2 - t1, time.perf_counter() - t2)
+        return estado, accion, reward, estado_siguiente
+
+    # Instrumentación: se escoge una sola vez el paso a usar, para no agregar costo sin instrumentación
+    if instrumentacion is not None:
+        paso, fase = step_instrumentado, instrumentacion.fase
+    else:
+        paso, fase = step, fase_nula
+
+    # Replay: se envuelve el paso elegido (sin costo adicional cuando replay=None); con instrumentación,
+    # el tiempo del replay (incluidos sus lotes de actualizaciones) se acumula en la fase "replay"
+    if replay is not None:
+        replay.validar(agente)
+        paso_base = paso
+
+        if instrumentacion is None:
+            def paso() -> Tuple[int, int, float, int]:
+                transicion = paso_base()
+                replay.registrar(agente, *transicion)
+                return transicion
+        else:
+            fase_replay = instrumentacion.fase("replay")
+
+            def paso() -> Tuple[int, int, float, int]:
+                transicion = paso_base()
+                with fase_replay:
+                    replay.registrar(agente, *transicion)
+                return transicion
+
     # Logging
-    agente_params = (agente.alpha, agente.epsilon, agente.gamma)
-    Q_values_lista = []
-    reward_historico = []
-    epsilon_episodico = [agente.epsilon]
-    pasos_historico = []
+    epsilon_inicial = agente.epsilon
+    resultados = ResultadosRun(episodios)
+    episodio_inicial = 1
+
+    # Reanudar desde un checkpoint
+    if reanudar and checkpoint is not None and os.path.exists(checkpoint):
+        ultimo_episodio, historiales = cargar_checkpoint(checkpoint, tablero, agente, replay, convergencia)
+        epsilon_inicial, episodios_ckpt, ciclos_ckpt = historiales["scheduler"].tolist()
+        if (int(episodios_ckpt), int(ciclos_ckpt)) != (episodios, epsilon_ciclos):
+            raise ValueError(
+                f"El checkpoint corresponde a episodios={int(episodios_ckpt)}, epsilon_ciclos={int(ciclos_ckpt)}"
+            )
+        resultados.restaurar(
+            pasos=historiales["pasos"], reward=historiales["reward"], epsilon=historiales["epsilon"],
+            resultado=np.where(historiales["victorias"], VICTORIA, PERDIDA), segundos=historiales["segundos"],
+        )
+        episodio_inicial = ultimo_episodio + 1
+        print(f"Reanudando desde el episodio {episodio_inicial} ({checkpoint})")
+        if convergencia is not None and convergencia.episodio is not None:
+            # El entrenamiento guardado ya se había detenido por convergencia: no se corren más episodios
+            print(f"Convergencia ya alcanzada en el episodio {convergencia.episodio}: {convergencia.motivo}")
+            episodio_inicial = episodios + 1
+
+    if registro is None:
+        registro = Registro()
+    registro.iniciar(resultados)
+
+    def guardar(episodio):
+        registro.sincronizar()
+        guardar_checkpoint(
+            checkpoint, tablero, agente, episodio, replay=replay, convergencia=convergencia,
+            scheduler=[epsilon_inicial, episodios, epsilon_ciclos],
+            reward=resultados.reward, pasos=resultados.pasos, victorias=resultados.victorias,
+            epsilon=resultados.epsilon, segundos=resultados.segundos,
+        )
+
+    agente_params = (agente.alpha, epsilon_inicial, agente.gamma)
+    if historial_valores is None and animacion:
+        historial_valores = HistorialValores(tablero, episodios)
+    elif historial_valores is None and path_animacion is not None:
+        historial_valores = HistorialValores(tablero, episodios, cada=max(1, episodios // max_frames))
 
     osc_scheduler = crear_scheduler_oscilante(
-        epsilon_inicial=agente.epsilon, max_episodios=episodios, n_ciclos=epsilon_ciclos
+        epsilon_inicial=epsilon_inicial, max_episodios=episodios, n_ciclos=epsilon_ciclos
     )
 
+    # La trayectoria del episodio solo se guarda si se usa (snapshots y animaciones)
+    guardar_trayectoria = historial_valores is not None
+    # La planificación y el replay actualizan Q también fuera de la trayectoria (ambos con tabla densa):
+    # los snapshots refrescan entonces todos los estados visitados
+    refrescar_visitados = replay is not None or isinstance(agente, AgenteBarridoPriorizado)
+    trayectoria_estado = None
+
     # Episodios
     time_s = time.time()
-    for episodio in range(1, episodios + 1):
+    ultimo_checkpoint = time_s
+    for episodio in range(episodio_inicial, episodios + 1):
 
         # Reiniciar condiciones al inicio de cada episodio
+        t_episodio = time.perf_counter()
         agente.pos = 1
-        trayectoria_estado = [agente.pos]
-        reward_acumulado = []
+        agente.reiniciar_episodio()
+        if guardar_trayectoria:
+            trayectoria_estado = [agente.pos]
+        reward_acumulado = 0
         pasos = 0
+        if instrumentacion is not None:
+            instrumentacion.inicio_episodio(episodio)
 
         # Recorrer tablero
         while True:
-            estado, accion, reward, estado_siguiente = step()
+            estado, accion, reward, estado_siguiente = paso()
             pasos += 1
-            trayectoria_estado.append(estado_siguiente)
-            reward_acumulado.append(reward)
+            if guardar_trayectoria:
+                trayectoria_estado.append(estado_siguiente)
+            reward_acumulado += reward
 
             # Evaluar si hay condición de finalización
-            if estado_siguiente in tablero.celdas_victoria:
-                print(f"Episodio {episodio} (✅) terminó en {pasos} pasos, con reward {sum(reward_acumulado)}.")
+            if estado_siguiente in tablero.set_victoria:
+                victoria = True
                 break
-            elif estado_siguiente in tablero.celdas_perdida:
-                print(f"Episodio {episodio} (❌) terminó en {pasos} pasos, con reward {sum(reward_acumulado)}.")
+            elif estado_siguiente in tablero.set_perdida:
+                victoria = False
                 break
 
         # Registrar logs
-        Q_values_lista.append(agente.max_Q_values())
-        reward_historico.append(sum(reward_acumulado))
-        pasos_historico.append(pasos)
+        resultados.registrar(pasos, reward_acumulado, agente.epsilon, victoria, time.perf_counter() - t_episodio)
+        with fase("logging"):
+            registro.registrar_episodio(episodio, victoria, pasos, reward_acumulado, agente.epsilon)
+        if historial_valores is not None:
+            with fase("snapshots"):
+                # Solo cambian los valores de los estados en los que se actualizó Q
+                if refrescar_visitados:
+                    tocados = np.flatnonzero(agente.Qtabla.visitado.any(axis=1)) + 1
+                else:
+                    tocados = np.unique(trayectoria_estado[:-1])
+                historial_valores.actualizar(tocados, agente.max_Q_estados(tocados))
+                historial_valores.snapshot(episodio)
+        if instrumentacion is not None:
+            instrumentacion.fin_episodio(episodio, pasos, agente)
 
         # EPSILON DECAY ------------------------------------------------
         # Proporcional al avance de la simulación (epsilon=0 al final)
@@ -106,20 +254,50 @@ def run(
 
         # Cosine Annealing
         agente.epsilon = osc_scheduler(episodio)
-        epsilon_episodico.append(agente.epsilon)
         # -------------------------------------------------------------
 
-    print(f"Completado en {time.time() - time_s:.4f} segundos")
+        # Parada temprana
+        if convergencia is not None and convergencia.verificar(episodio, tablero, agente, resultados.reward):
+            with fase("logging"):
+                registro.registrar_convergencia(episodio, convergencia.motivo)
+            if historial_valores is not None:
+                historial_valores.snapshot(episodio, forzar=True)
+            break
+
+        # Checkpoint periódico (después de verificar la convergencia, para guardar el estado del criterio)
+        if checkpoint is not None and (
+            (checkpoint_cada is not None and episodio % checkpoint_cada == 0)
+            or (checkpoint_segundos is not None and time.time() - ultimo_checkpoint >= checkpoint_segundos)
+        ):
+            with fase("checkpoint"):
+                guardar(episodio)
+            ultimo_checkpoint = time.time()
+
+    # Episodios completados (menos que 'episodios' si hubo parada temprana)
+    episodios_corridos = len(resultados)
+    with fase("logging"):
+        registro.finalizar(time.time() - time_s)
+    if checkpoint is not None:
+        with fase("checkpoint"):
+            guardar(episodios_corridos)
+    if instrumentacion is not None:
+        instrumentacion.finalizar(time.time() - time_s)
 
+    # Reportes y gráficos finales
+    t_ploteo = time.perf_counter()
+    # Epsilon de cada episodio más el vigente al terminar (formato de visualizacion)
+    epsilon_episodico = np.append(resultados.epsilon, agente.epsilon)
     if plot_pasos:
+        # matplotlib solo se importa si se pide un gráfico (el entrenamiento sin gráficos no lo carga)
+        import matplotlib.pyplot as plt
         fig, (ax1, ax2, ax3) = plt.subplots(3, 1, figsize=(8, 4))
         for ax in (ax1, ax2, ax3):
-            ax.set_xlim(1, episodios + 1)
+            ax.set_xlim(1, episodios_corridos + 1)
             for spine in ax.spines.values():
                 spine.set_alpha(0.25)
-        ax1.semilogy(range(1, episodios + 1), pasos_historico, alpha=1, color='black', label="Número de pasos")
-        ax2.plot(range(1, episodios + 1), epsilon_episodico[:-1], color='black', alpha=1, label="Reward acumulado")
-        ax3.plot(range(1, episodios + 1), reward_historico, color='blue', alpha=1, label="Reward acumulado")
+        ax1.semilogy(range(1, episodios_corridos + 1), resultados.pasos, alpha=1, color='black', label="Número de pasos")
+        ax2.plot(range(1, episodios_corridos + 1), resultados.epsilon, color='black', alpha=1, label="Reward acumulado")
+        ax3.plot(range(1, episodios_corridos + 1), resultados.reward, color='blue', alpha=1, label="Reward acumulado")
         ax3.set_yscale('symlog')
         fsize = 13
         ax1.set_ylabel("Pasos", fontsize=fsize)
@@ -137,7 +315,24 @@ def run(
         print("\nPolítica:\n' ' = celda terminal o no explorada")
         print("'X' = movimiento único en escalera/rodadero\n", politica)
 
-    if animacion:
-        plot_tablero(tablero, agente_params, Q_values_lista, trayectoria_estado, epsilon_episodico, interval)
+    # Al reanudar un entrenamiento ya terminado no hay episodios nuevos (ni snapshots ni trayectoria)
+    animable = historial_valores is not None and historial_valores.n > 0 and trayectoria_estado is not None
+    if (animacion or path_animacion is not None) and not animable:
+        print("Sin episodios corridos en esta ejecución: no se genera la animación")
+    if animacion and animable:
+        from visualizacion import plot_tablero
+        plot_tablero(
+            tablero, agente_params, historial_valores.valores, historial_valores.episodios,
+            trayectoria_estado, epsilon_episodico, interval
+        )
+    if path_animacion is not None and animable:
+        from visualizacion import exportar_animacion
+        n_frames = exportar_animacion(
+            tablero, agente_params, historial_valores.valores, historial_valores.episodios,
+            trayectoria_estado, epsilon_episodico, path_animacion, max_frames=max_frames
+        )
+        print(f"Animación ({n_frames} frames) guardada en {path_animacion}")
+    if instrumentacion is not None:
+        instrumentacion.registrar_fase("ploteo", time.perf_counter() - t_ploteo)
 
-    return reward_historico, agente.Qtabla
+    return resultados, agente.Qtabla
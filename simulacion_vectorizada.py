@@ -0,0 +1,131 @@
+from simulacion import crear_scheduler_oscilante
+from qtabla import QTablaDensa
+import numpy as np
+import time
+
+
+def run_vectorizado(
+    tablero, agente, episodios,
+    # Número de entornos (episodios independientes) que avanzan en paralelo
+    n_entornos=8,
+    # Ciclos de oscilación para epsilon
+    epsilon_ciclos=5,
+    # True: todos los entornos actualizan la Q-tabla del agente
+    # False: cada entorno entrena una copia propia de la Q-tabla (shards)
+    compartir_Q=True,
+    semilla=None,
+    # Límite opcional de pasos por episodio (None = sin límite, igual que run)
+    max_pasos=None,
+):
+    """
+    Correr 'n_entornos' simulaciones del tablero a la vez, cada una con 'episodios' episodios.
+    Equivale a ejecutar run() n_entornos veces, pero cada paso avanza a todos los entornos con
+    operaciones de Numpy (transición, reward, epsilon-greedy y actualización Q).
+
+    Retorna:
+        - reward_historico: array (n_entornos, episodios)
+        - pasos_historico: array (n_entornos, episodios)
+        - Q-tabla: la del agente (compartir_Q=True) o una lista de QTablaDensa por entorno
+    """
+    if not agente.tabla_densa:
+        raise ValueError("run_vectorizado requiere un agente con tabla_densa=True")
+
+    rng = np.random.default_rng(semilla)
+    alpha, gamma = agente.alpha, agente.gamma
+    tabla = agente.Qtabla
+    validas = tabla.validas
+    n_acciones = validas.shape[1]
+
+    # Q-tabla compartida (vista del array del agente) o una copia por entorno
+    if compartir_Q:
+        Q, visitado = tabla.Q, tabla.visitado
+    else:
+        Q = np.repeat(tabla.Q[None], n_entornos, axis=0)
+        visitado = np.repeat(tabla.visitado[None], n_entornos, axis=0)
+
+    # El episodio e (desde 0) usa epsilon = scheduler(e), con scheduler(0) = epsilon inicial
+    osc_scheduler = crear_scheduler_oscilante(
+        epsilon_inicial=agente.epsilon, max_episodios=episodios, n_ciclos=epsilon_ciclos
+    )
+
+    # Estado de los entornos
+    pos = np.ones(n_entornos, dtype=np.int64)
+    episodio = np.zeros(n_entornos, dtype=np.int64)
+    pasos = np.zeros(n_entornos, dtype=np.int64)
+    reward_acumulado = np.zeros(n_entornos)
+    activos = np.arange(n_entornos)
+
+    # Logging
+    reward_historico = np.zeros((n_entornos, episodios))
+    pasos_historico = np.zeros((n_entornos, episodios), dtype=np.int64)
+
+    time_s = time.time()
+    while activos.size:
+        estados = pos[activos]
+        n = activos.size
+
+        # Q-valores de las acciones en el estado actual (-inf en acciones no válidas)
+        filas_Q = Q[estados - 1] if compartir_Q else Q[activos, estados - 1]
+        validas_s = validas[estados - 1]
+        Q_validas = np.where(validas_s, filas_Q, -np.inf)
+
+        # Epsilon-greedy: candidatas = acciones válidas (exploración) o mejores acciones (explotación).
+        # Un valor uniforme por candidata y su argmax equivale a escoger una candidata al azar
+        explorar = rng.random(n) < osc_scheduler(episodio[activos])
+        mejores = Q_validas == Q_validas.max(axis=1, keepdims=True)
+        candidatas = np.where(explorar[:, None], validas_s, mejores)
+        acciones = np.argmax(rng.random((n, n_acciones)) * candidatas, axis=1)
+
+        # Transición y Reward del paso actual
+        estados_siguientes = tablero.transicion_vectorizada(estados, acciones)
+        rewards = tablero.reward_vectorizado(estados_siguientes)
+
+        # Actualización Q-learning
+        filas_Q_sig = Q[estados_siguientes - 1] if compartir_Q else Q[activos, estados_siguientes - 1]
+        Q_siguiente_max = np.where(validas[estados_siguientes - 1], filas_Q_sig, -np.inf).max(axis=1)
+        Q_actual = filas_Q[np.arange(n), acciones]
+        deltas = alpha * (rewards + gamma * Q_siguiente_max - Q_actual)
+        if compartir_Q:
+            # Varios entornos pueden actualizar el mismo (estado, acción) en un paso: se aplica el
+            # promedio de sus deltas (sumarlos equivaldría a un alpha multiplicado, inestable)
+            tocadas, inverso = np.unique((estados - 1) * n_acciones + acciones, return_inverse=True)
+            Q.flat[tocadas] += np.bincount(inverso, weights=deltas) / np.bincount(inverso)
+            visitado.flat[tocadas] = True
+        else:
+            Q[activos, estados - 1, acciones] += deltas
+            visitado[activos, estados - 1, acciones] = True
+
+        # Avanzar entornos
+        pos[activos] = estados_siguientes
+        pasos[activos] += 1
+        reward_acumulado[activos] += rewards
+
+        # Entornos con episodio terminado: registrar y reiniciar
+        terminados = tablero.terminal[estados_siguientes]
+        if max_pasos is not None:
+            terminados |= pasos[activos] >= max_pasos
+        if terminados.any():
+            fin = activos[terminados]
+            reward_historico[fin, episodio[fin]] = reward_acumulado[fin]
+            pasos_historico[fin, episodio[fin]] = pasos[fin]
+            pos[fin] = 1
+            pasos[fin] = 0
+            reward_acumulado[fin] = 0.0
+            episodio[fin] += 1
+            activos = activos[episodio[activos] < episodios]
+
+    print(f"Completado en {time.time() - time_s:.4f} segundos ({n_entornos} entornos)")
+
+    agente.epsilon = osc_scheduler(episodios)
+    agente.pos = 1
+
+    if compartir_Q:
+        return reward_historico, pasos_historico, tabla
+
+    # Cada shard es una vista sobre el array (n_entornos, celda_max, nro_acciones)
+    tablas = []
+    for i in range(n_entornos):
+        shard = QTablaDensa(validas, Q=Q[i])
+        shard.visitado = visitado[i]
+        tablas.append(shard)
+    return reward_historico, pasos_historico, tablas
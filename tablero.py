@@ -1,10 +1,22 @@
 from typing import Tuple, List
+import hashlib
+import numpy as np
 
+# Espacio de acciones con un orden fijo. El índice de cada acción corresponde a la columna
+# que ocupa en las estructuras densas (Q-tabla como array, tablas de transición, etc.)
+#   -1 / 1  : retroceder / avanzar una celda
+#   "auto"  : movimiento único al caer en el inicio de una escalera o rodadero
+#   None    : celdas terminales (sin acción)
+ACCIONES = (-1, 1, "auto", None)
+INDICE_ACCION = {a: i for i, a in enumerate(ACCIONES)}
+# Desplazamiento asociado a cada índice de acción (las acciones sin movimiento valen 0)
+DESPLAZAMIENTOS = np.array([a if isinstance(a, int) else 0 for a in ACCIONES])
 
-def coord_a_celda(col, fila, nro_columnas=10) -> int:
+
+def coord_a_celda(col, fila, nro_columnas=10):
     """
         Obtener el número de celda a partir del par: (columna, fila).
-        El conteo de índices comienza en 1
+        El conteo de índices comienza en 1. Acepta escalares o arrays de Numpy
         """
     # Valor base:
     #   Coordenadas con filas pares inician su conteo en fila * nro_columnas
@@ -13,12 +25,16 @@ def coord_a_celda(col, fila, nro_columnas=10) -> int:
     # Valor offset:
     #   Coordenadas con filas pares disminuyen de izquierda a derecha
     #   Coordenadas con filas impares aumentan de izquierda a derecha
-    offset = (-1) ** (fila - 1) * (col - ((fila - 1) % 2))
+    #   (1 - 2 * ((fila - 1) % 2) equivale a (-1) ** (fila - 1), también con arrays)
+    offset = (1 - 2 * ((fila - 1) % 2)) * (col - ((fila - 1) % 2))
     # Sumar y retornar ambos valores
     return valor_inicial + offset
 
 
 class Tablero:
+    # Transiciones deterministas (ver estocastico.TableroEstocastico)
+    estocastico = False
+
     def __init__(
         self,
         nro_filas: int,
@@ -35,21 +51,24 @@ class Tablero:
         if nro_filas < 2 or nro_columnas < 2:
             raise ValueError("Debe haber al menos 2 filas y 2 columnas")
         self.celda_max = nro_filas * nro_columnas
-        celdas_a_validar = (celdas_victoria + celdas_perdida
-                            + [celda for par in celdas_escalera for celda in par]
-                            + [celda for par in celdas_rodadero for celda in par]
-                            )
+        celdas_a_validar = np.concatenate([
+            np.asarray(celdas, dtype=np.int64).ravel()
+            for celdas in (celdas_victoria, celdas_perdida, celdas_escalera, celdas_rodadero)
+        ])
         # Todas los números de celda deben encontrarse dentro de los límites
-        for celda in celdas_a_validar:
-            if not (1 <= celda <= self.celda_max):
-                raise ValueError(f"{celda} fuera de los limites: {1} a {self.celda_max}")
+        fuera = (celdas_a_validar < 1) | (celdas_a_validar > self.celda_max)
+        if fuera.any():
+            raise ValueError(f"{celdas_a_validar[fuera][0]} fuera de los limites: {1} a {self.celda_max}")
         # -------------------------------------------------------------------------------
 
         # Atributos
         self.nro_filas = nro_filas
         self.nro_columnas = nro_columnas
         self.celdas_victoria = celdas_victoria
-        self.celdas_perdida = [c for c in celdas_perdida if c not in celdas_victoria]
+        # Conjuntos para las pruebas de pertenencia en el ciclo de entrenamiento
+        self.set_victoria = set(celdas_victoria)
+        self.celdas_perdida = [c for c in celdas_perdida if c not in self.set_victoria]
+        self.set_perdida = set(self.celdas_perdida)
         self.celdas_escalera = celdas_escalera
         self.celdas_rodadero = celdas_rodadero
         self.espacio_estados = range(1, nro_filas * nro_columnas + 1)
@@ -69,21 +88,67 @@ class Tablero:
         }
         self.r_otros = r_otros
 
+        # Tablas precalculadas del MDP ---------------------------------------------------
+        # El tablero es estático, por lo que las dinámicas se calculan una sola vez como arrays
+        # indexados por número de celda (índice 0 sin uso) y por índice de acción (INDICE_ACCION):
+        #   - destino[s]: final de la escalera/rodadero que inicia en s (0 si no hay)
+        #   - siguiente_estado[s, a]: celda resultante de tomar la acción a en s
+        #   - reward_celda[s']: reward al llegar a s'
+        #   - terminal[s]: celdas de victoria o pérdida
+        #   - acciones_validas[s, a]: mask de acciones disponibles en s
+        celdas = np.arange(self.celda_max + 1)
+        self.destino = np.zeros(self.celda_max + 1, dtype=np.int64)
+        self.destino[list(self.escaleras_y_rodaderos)] = list(self.escaleras_y_rodaderos.values())
+        adyacentes = np.clip(celdas[:, None] + DESPLAZAMIENTOS[None, :], 1, self.celda_max)
+        self.siguiente_estado = np.where(self.destino[:, None] > 0, self.destino[:, None], adyacentes)
+        self.siguiente_estado[0] = 0
+
+        self.reward_celda = np.full(self.celda_max + 1, float(r_otros))
+        self.reward_celda[list(self.reward_terminales)] = list(self.reward_terminales.values())
+        self.terminal = np.zeros(self.celda_max + 1, dtype=bool)
+        self.terminal[list(self.reward_terminales)] = True
+
+        # Acciones válidas por celda (mismo criterio que AgenteQLearning.s_acciones):
+        #   inicio de escalera/rodadero -> "auto", terminal -> None, resto -> -1 y 1
+        escalera_o_rodadero = self.destino > 0
+        terminal_sin_escalera = self.terminal & ~escalera_o_rodadero
+        normal = ~escalera_o_rodadero & ~self.terminal
+        normal[0] = False
+        self.acciones_validas = np.zeros((self.celda_max + 1, len(ACCIONES)), dtype=bool)
+        self.acciones_validas[:, INDICE_ACCION["auto"]] = escalera_o_rodadero
+        self.acciones_validas[:, INDICE_ACCION[None]] = terminal_sin_escalera
+        self.acciones_validas[:, INDICE_ACCION[-1]] = normal
+        self.acciones_validas[:, INDICE_ACCION[1]] = normal
+
+        # Índices (fila, columna) desde 0 de cada celda en la grilla (fila 0 abajo, índice 0 sin uso)
+        # para construir grillas con fancy indexing: grilla[fila_celda[estados], columna_celda[estados]]
+        offset = (celdas - 1) % nro_columnas
+        self.fila_celda = (celdas - 1) // nro_columnas
+        # Filas pares (desde 0) van de izquierda a derecha, impares de derecha a izquierda
+        self.columna_celda = np.where(self.fila_celda % 2 == 0, offset, nro_columnas - 1 - offset)
+
+    def huella(self) -> str:
+        """
+        Hash (sha256) de las dimensiones y dinámicas del tablero. Dos tableros con la misma
+        huella tienen las mismas transiciones, rewards y acciones válidas.
+        """
+        h = hashlib.sha256()
+        h.update(np.array([self.nro_filas, self.nro_columnas], dtype=np.int64).tobytes())
+        for arr in (self.siguiente_estado, self.reward_celda, self.acciones_validas):
+            h.update(np.ascontiguousarray(arr).tobytes())
+        return h.hexdigest()
+
     # Métodos auxiliares para manejar las equivalencias 2D <-> 1D -------------------
-    def celda_a_coord(self, nro_celda, centrar=True) -> tuple[float, float]:
+    def celda_a_coord(self, nro_celda, centrar=True):
         """
         Obtener coordenada (columna, fila) a partir del número de celda.
+        Acepta un número de celda o un array de celdas (retorna dos arrays)
         """
-        # -1 para manejar los multiplos de 'nro_columnas'
-        fila = ((nro_celda - 1) // self.nro_columnas) + 1
-        offset = (nro_celda - 1) % self.nro_columnas
-
-        # Si la fila es impar...
-        if fila % 2 == 1:
-            columna = offset + 1  # ...la secuencia va de izquierda a derecha
-        # Si la fila es par...
-        else:
-            columna = self.nro_columnas - offset  # ...la secuencia va de derecha a izquierda
+        # Tablas precalculadas (índices desde 0)
+        columna = self.columna_celda[nro_celda] + 1
+        fila = self.fila_celda[nro_celda] + 1
+        if np.ndim(nro_celda) == 0:
+            columna, fila = int(columna), int(fila)
         # Retornar coordenada centrada (para ploteo principalmente)
         if centrar:
             return (columna - 0.5, fila - 0.5)
@@ -97,14 +162,10 @@ class Tablero:
             - El final de una escalera/rodadero
             - Celda adyacente válida dentro de los límites
         """
-        # Si el estado actual es el inicio de una escalera/rodadero, entonces retorna el final
-        if estado in self.escaleras_y_rodaderos.keys():
-            return self.escaleras_y_rodaderos[estado]
-
-        # En caso contrario, solo valida límites
-        else:
-            return max(1, min(estado + accion, self.celda_max))
-            # Nota: La condición de finalización se evalúa en simulacion.py
+        # La tabla ya contiene el final de la escalera/rodadero (si el estado es el inicio de una)
+        # o la celda adyacente dentro de los límites
+        return self.siguiente_estado.item(estado, INDICE_ACCION[accion])
+        # Nota: La condición de finalización se evalúa en simulacion.py
 
     def reward(self, estado_siguiente):
         """
@@ -112,9 +173,41 @@ class Tablero:
             - La recompensa de los estados terminales
             - Valor por defecto para todos los otros estados
         """
+        # Búsqueda escalar en el diccionario (más rápida que reward_celda.item); el array
+        # reward_celda se usa en reward_vectorizado y en las tablas del MDP
         return self.reward_terminales.get(
             # Recompensa de celda victoria o de celda trampa
             estado_siguiente,
             # Recompensa negativa. La intención es presionar al agente para ganar lo antes posible
             self.r_otros
         )
+
+    def esperanza(self, v: np.ndarray) -> np.ndarray:
+        """
+        Valor esperado de 'v' (array indexado por número de celda) en el estado siguiente de cada
+        par (estado, acción): array (celda_max + 1, nro_acciones). En este tablero cada par tiene un
+        único sucesor, por lo que es v[siguiente_estado].
+        """
+        return v[self.siguiente_estado]
+
+    def sucesores(self, estados: np.ndarray, acciones: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Transiciones de los pares (estados[i], acciones[i]) en formato COO: (i, s', probabilidad).
+        Permite armar una sola vez la matriz de una política fija, p.ej.
+            np.bincount(i, weights=probabilidad * v[s'], minlength=len(estados))
+        """
+        estados = np.asarray(estados)
+        return np.arange(len(estados)), self.siguiente_estado[estados, acciones], np.ones(len(estados))
+
+    # Versiones vectorizadas (arrays de estados) -------------------------------------
+    def transicion_vectorizada(self, estados: np.ndarray, acciones: np.ndarray) -> np.ndarray:
+        """
+        Equivalente a 'transicion' para arrays de estados e índices de acción (ver INDICE_ACCION)
+        """
+        return self.siguiente_estado[estados, acciones]
+
+    def reward_vectorizado(self, estados_siguientes: np.ndarray) -> np.ndarray:
+        """
+        Equivalente a 'reward' para un array de estados siguientes
+        """
+        return self.reward_celda[estados_siguientes]
@@ -4,37 +4,48 @@ from matplotlib.gridspec import GridSpec
 import matplotlib.animation as animation
 from matplotlib.colors import TwoSlopeNorm
 from matplotlib.cm import get_cmap
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib import colormaps
+from PIL import Image
+import subprocess
+import shutil
+import os
 import numpy as np
 from tablero import coord_a_celda
 
+# Sobre este número de celdas, el tablero se dibuja sin números de celda, ticks por celda ni flechas
+# individuales (las escaleras y rodaderos se dibujan como una sola colección de líneas)
+MAX_CELDAS_DETALLE = 400
 
-def plot_tablero(tablero, a_params, Q_values_lista, trayectoria, epsilon_episodico, interval) -> None:
+
+def dibujar_tablero(fig, tablero, detalle: bool = None):
     """
-    Plotear el tablero y mostrar dos animaciones:
-        - Evolución de los estado-valores durante todos los episodios
-        - Recorrido del agente con la última política obtenida (episodio final)
+    Dibuja los elementos estáticos del tablero (grilla, números de celda, celdas terminales,
+    escaleras y rodaderos) y retorna los ejes (tablero, colorbar, epsilon)
     """
     nro_filas, nro_columnas = tablero.nro_filas, tablero.nro_columnas
+    if detalle is None:
+        detalle = tablero.celda_max <= MAX_CELDAS_DETALLE
 
-    # Configuración del plot ---------------------------------------------------------------
-    fig = plt.figure(figsize=(nro_columnas, nro_filas), dpi=80)
-    gs = GridSpec(2, 2, width_ratios=[15, 1], height_ratios=[4, 1], hspace=0.25)
-
+    gs = GridSpec(2, 2, figure=fig, width_ratios=[15, 1], height_ratios=[4, 1], hspace=0.25)
     t_axis = fig.add_subplot(gs[0, 0])
     cb_axis = fig.add_subplot(gs[0, 1])
     eps_axis = fig.add_subplot(gs[1, :])
 
     t_axis.set_xlim(0, nro_columnas)
     t_axis.set_ylim(0, nro_filas)
-    t_axis.set_xticks(range(1, nro_columnas + 1))
-    t_axis.set_yticks(range(1, nro_filas + 1))
-    labels_x = [str(i) for i in range(nro_columnas)]
-    labels_y = [str(i) for i in range(nro_filas - 1, -1, -1)]
-    t_axis.set_xticklabels(labels_x, color='gray')
-    t_axis.set_yticklabels(labels_y, color='gray')
-    plt.setp(t_axis.xaxis.get_majorticklabels(), ha="right")
-    plt.setp(t_axis.yaxis.get_majorticklabels(), va="top")
-    t_axis.grid(color="black", linewidth=1)
+    if detalle:
+        t_axis.set_xticks(range(1, nro_columnas + 1))
+        t_axis.set_yticks(range(1, nro_filas + 1))
+        labels_x = [str(i) for i in range(nro_columnas)]
+        labels_y = [str(i) for i in range(nro_filas - 1, -1, -1)]
+        t_axis.set_xticklabels(labels_x, color='gray')
+        t_axis.set_yticklabels(labels_y, color='gray')
+        plt.setp(t_axis.xaxis.get_majorticklabels(), ha="right")
+        plt.setp(t_axis.yaxis.get_majorticklabels(), va="top")
+        t_axis.grid(color="black", linewidth=1)
     t_axis.tick_params(
         axis="both", which="both",
         bottom=True, top=False, left=False, right=False,
@@ -42,65 +53,67 @@ def plot_tablero(tablero, a_params, Q_values_lista, trayectoria, epsilon_episodi
     )
 
     # Anotaciones en el tablero ------------------------------------------------------------
-    # Números de celdas
-    for fila in range(1, nro_filas + 1):
-        for col in range(1, nro_columnas + 1):
-            nro_celda = coord_a_celda(col, fila, nro_columnas)
+    if detalle:
+        # Números de celdas (grilla de coordenadas convertida en una sola operación)
+        cols, filas = np.meshgrid(np.arange(1, nro_columnas + 1), np.arange(1, nro_filas + 1))
+        nros_celda = coord_a_celda(cols, filas, nro_columnas)
+        for col, fila, nro_celda in zip(cols.ravel().tolist(), filas.ravel().tolist(), nros_celda.ravel().tolist()):
             t_axis.text(col - 0.5, fila - 0.35, str(nro_celda), ha="center", va="bottom", alpha=1)
 
-    # Posiciones de victoria
-    for celda in tablero.celdas_victoria:
-        t_axis.text(*tablero.celda_a_coord(celda), "V", ha="center", va="top", color="blue", size=15)
+        # Posiciones de victoria
+        for x, y in zip(*tablero.celda_a_coord(np.asarray(tablero.celdas_victoria, dtype=np.int64))):
+            t_axis.text(x, y, "V", ha="center", va="top", color="blue", size=15)
 
     # Posiciones de pérdida
-    for celda in tablero.celdas_perdida:
-        t_axis.scatter(*tablero.celda_a_coord(celda), color="red", s=150, marker="X")
+    if tablero.celdas_perdida:
+        t_axis.scatter(*tablero.celda_a_coord(np.asarray(tablero.celdas_perdida)), color="red",
+                       s=150 if detalle else 1, marker="X")
 
     # Escaleras y Rodaderos ----------------------------------------------------------------
-    for par in tablero.celdas_escalera:
-        x1, y1 = tablero.celda_a_coord(par[0])
-        x2, y2 = tablero.celda_a_coord(par[1])
-        arrow = mpatches.FancyArrow(x1, y1, x2 - x1, y2 - y1,
-                                    width=0.05, length_includes_head=True,
-                                    color="blue", alpha=0.5)
-        t_axis.add_patch(arrow)
-
-    for par in tablero.celdas_rodadero:
-        x1, y1 = tablero.celda_a_coord(par[0])
-        x2, y2 = tablero.celda_a_coord(par[1])
-        arrow = mpatches.FancyArrow(x1, y1, x2 - x1, y2 - y1,
-                                    width=0.05, length_includes_head=True,
-                                    color="black", alpha=0.5)
-        t_axis.add_patch(arrow)
+    for pares, color in ((tablero.celdas_escalera, "blue"), (tablero.celdas_rodadero, "black")):
+        if not len(pares):
+            continue
+        pares = np.asarray(pares, dtype=np.int64)
+        x1, y1 = tablero.celda_a_coord(pares[:, 0])
+        x2, y2 = tablero.celda_a_coord(pares[:, 1])
+        if not detalle:
+            segmentos = np.stack([np.column_stack([x1, y1]), np.column_stack([x2, y2])], axis=1)
+            t_axis.add_collection(LineCollection(segmentos, colors=color, linewidths=0.5, alpha=0.5))
+            continue
+        for a, b, dx, dy in zip(x1.tolist(), y1.tolist(), (x2 - x1).tolist(), (y2 - y1).tolist()):
+            arrow = mpatches.FancyArrow(a, b, dx, dy,
+                                        width=0.05, length_includes_head=True,
+                                        color=color, alpha=0.5)
+            t_axis.add_patch(arrow)
+
+    return t_axis, cb_axis, eps_axis
+
+
+def plot_tablero(tablero, a_params, valores, episodios_valores, trayectoria, epsilon_episodico, interval) -> None:
+    """
+    Plotear el tablero y mostrar dos animaciones:
+        - Evolución de los estado-valores durante todos los episodios
+        - Recorrido del agente con la última política obtenida (episodio final)
+    'valores' es un array (snapshots, filas, columnas) con numpy.nan en celdas no visitadas
+    (ver historial.HistorialValores) y 'episodios_valores' el episodio de cada snapshot.
+    """
+    nro_filas, nro_columnas = tablero.nro_filas, tablero.nro_columnas
+
+    # Configuración del plot ---------------------------------------------------------------
+    fig = plt.figure(figsize=(nro_columnas, nro_filas), dpi=80)
+    t_axis, cb_axis, eps_axis = dibujar_tablero(fig, tablero)
 
     # Animar evolución de Q-values y trayectoria -------------------------------------------
-    # Lista con los mapas de estado-valores
-    vmaps = []
     # Masks para cubrir celdas no visitadas (con un color distinto al colormap principal)
-    masks = []
-    # Por cada episodio...
-    for qdict in Q_values_lista:
-        # ... inicializar Q-valores en 0 y todas las celdas como 'no visitadas'
-        vmap_vals = np.zeros((nro_filas, nro_columnas))
-        mask_novisitada = np.ones((nro_filas, nro_columnas), dtype=bool)
-        # Actualizar valores y celda visitadas
-        for celda, q in qdict.items():
-            # Coordenadas (con el cambio: coord2 = fila, coord1 = columna)
-            x, y = tablero.celda_a_coord(celda)
-            ix, iy = int(y), int(x)
-            # Q-valor actual y celda visitada
-            vmap_vals[ix, iy] = q
-            mask_novisitada[ix, iy] = False
-        vmaps.append(vmap_vals)
-        masks.append(mask_novisitada)
+    masks = np.isnan(valores)
 
     # Norma para el colormap divergente
-    max_abs = np.max(np.abs(vmaps[0]))
+    max_abs = np.nanmax(np.abs(valores[0])) if not masks[0].all() else 1.0
     # norm = TwoSlopeNorm(vmin=min_abs, vcenter=0.0, vmax=max_abs)
     norm = TwoSlopeNorm(vmin=-max_abs, vcenter=0.0, vmax=max_abs)
 
     # Mask inicial de celdas no visitadas
-    mask0 = np.ma.MaskedArray(vmaps[0], mask=masks[0])
+    mask0 = np.ma.MaskedArray(valores[0], mask=masks[0])
 
     # Mapa
     im = t_axis.imshow(
@@ -114,9 +127,13 @@ def plot_tablero(tablero, a_params, Q_values_lista, trayectoria, epsilon_episodi
     # Color de celdas no visitadas
     im.cmap.set_bad(color='black', alpha=1)
 
-    # Frames totales para la animación: Entrenamiento + Trayectoria final
-    num_episodios = len(vmaps)
-    frames_totales = num_episodios + len(trayectoria)
+    # Coordenadas de la trayectoria final (una sola conversión para todos los frames)
+    tray_x, tray_y = tablero.celda_a_coord(np.asarray(trayectoria, dtype=np.int64))
+
+    # Frames totales para la animación: Entrenamiento (un frame por snapshot) + Trayectoria final
+    num_episodios = len(epsilon_episodico) - 1
+    num_snapshots = len(valores)
+    frames_totales = num_snapshots + len(trayectoria)
 
     # Plot inicial de color bar y figura que representa al agente (se actualizarán por cada frame)
     cbar = plt.colorbar(im, cb_axis, label='Q-valor')
@@ -142,20 +159,21 @@ def plot_tablero(tablero, a_params, Q_values_lista, trayectoria, epsilon_episodi
         artists = []
 
         # Animación de Q-valores
-        if f < num_episodios:
-            m = np.ma.MaskedArray(vmaps[f], mask=masks[f])
+        if f < num_snapshots:
+            m = np.ma.MaskedArray(valores[f], mask=masks[f])
             im.set_data(m)
 
             # Actualizar colores y colorbar
             im.set_clim(m.min(), m.max())
             cbar.update_normal(im)
+            episodio = episodios_valores[f]
             t_axis.set_title(
-                f"Q-valor máximo por estado para el episodio {f}\n{params_str}",
+                f"Q-valor máximo por estado para el episodio {episodio}\n{params_str}",
                 fontsize=15
             )
 
             # Actualizar valor epsilon
-            dot_eps.set_data([f], [epsilon_episodico[f]])
+            dot_eps.set_data([episodio - 1], [epsilon_episodico[episodio - 1]])
 
             artists += [im, cbar, dot_eps]
 
@@ -165,9 +183,9 @@ def plot_tablero(tablero, a_params, Q_values_lista, trayectoria, epsilon_episodi
                 f"Q-valor máximo por estado para el episodio {num_episodios}\n{params_str}",
                 fontsize=15
             )
-            x, y = tablero.celda_a_coord(trayectoria[f - num_episodios])
-            dot.set_data([x], [y])
-            dot_eps.set_data([f], [epsilon_episodico[-1]])
+            i = f - num_snapshots
+            dot.set_data(tray_x[i:i + 1], tray_y[i:i + 1])
+            dot_eps.set_data([num_episodios], [epsilon_episodico[-1]])
             artists.append(dot)
 
         return artists
@@ -184,3 +202,140 @@ def plot_tablero(tablero, a_params, Q_values_lista, trayectoria, epsilon_episodi
     )
 
     plt.show()
+
+
+def seleccionar_frames(total: int, max_frames: int = None) -> np.ndarray:
+    """
+    Índices de hasta 'max_frames' frames repartidos uniformemente entre 0 y total - 1
+    (incluye siempre el primero y el último)
+    """
+    if max_frames is None or total <= max_frames:
+        return np.arange(total)
+    return np.unique(np.linspace(0, total - 1, max_frames).round().astype(np.int64))
+
+
+def exportar_animacion(
+    tablero, a_params, valores, episodios_valores, trayectoria, epsilon_episodico, path,
+    max_frames: int = 200, fps: int = 10, dpi: int = 80, detalle: bool = None,
+) -> int:
+    """
+    Versión sin ventana (backend Agg) de plot_tablero que escribe la animación a un archivo:
+        - '.gif': GIF animado (Pillow)
+        - '.mp4': video H.264 (requiere ffmpeg en el PATH)
+        - Otro path: carpeta con un PNG por frame (frame_00000.png, ...)
+    Los elementos estáticos se dibujan una sola vez; en cada frame se restaura el fondo y solo
+    se redibujan el mapa de Q-valores, el agente, epsilon y el título (blitting). La norma del
+    colormap es fija (máximo absoluto de todos los snapshots), así que la colorbar no cambia.
+    Los snapshots se submuestrean a 'max_frames' frames (None = todos; siempre se incluye el último) y
+    la trayectoria del episodio final se dibuja completa, sobre el último snapshot.
+    Retorna el número de frames escritos.
+    """
+    nro_filas, nro_columnas = tablero.nro_filas, tablero.nro_columnas
+    escala = min(1.0, 12 / max(nro_filas, nro_columnas))
+    fig = Figure(figsize=(nro_columnas * escala, nro_filas * escala), dpi=dpi)
+    canvas = FigureCanvasAgg(fig)
+    t_axis, cb_axis, eps_axis = dibujar_tablero(fig, tablero, detalle)
+
+    # Norma fija para todos los frames
+    masks = np.isnan(valores)
+    max_abs = float(np.nanmax(np.abs(valores))) if not masks.all() else 1.0
+    norm = TwoSlopeNorm(vmin=-max_abs, vcenter=0.0, vmax=max(max_abs, 1e-12))
+
+    # Artistas dinámicos (animated=True: quedan fuera del fondo y se dibujan en cada frame)
+    im = t_axis.imshow(
+        np.ma.MaskedArray(valores[0], mask=masks[0]),
+        origin='lower',
+        extent=[0, nro_columnas, 0, nro_filas],
+        cmap=colormaps['bwr_r'].with_extremes(bad='black'), norm=norm,
+        alpha=0.5, animated=True,
+    )
+    fig.colorbar(im, cax=cb_axis, label='Q-valor')
+    dot, = t_axis.plot([], [], 'bo', markersize=12 * escala, animated=True)
+    titulo = t_axis.set_title("", fontsize=15 * max(escala, 0.7))
+    titulo.set_animated(True)
+    t_axis.set_xlabel("(celdas terminales y nunca visitadas en gris)", fontsize=13)
+
+    num_episodios = len(epsilon_episodico) - 1
+    eps_axis.plot(range(num_episodios + 1), epsilon_episodico, color='black', alpha=0.50)
+    dot_eps, = eps_axis.plot([], [], marker=r'$\epsilon$', linestyle='None', color='black',
+                             markersize=10, animated=True)
+    eps_axis.set_xlim(0, num_episodios)
+    eps_axis.set_ylim(0, 1)
+    eps_axis.set_title("Oscilación de epsilon")
+    eps_axis.grid(True)
+
+    params_str = f"α = {a_params[0]}, ε = {a_params[1]}, γ = {a_params[2]}"
+    tray_x, tray_y = tablero.celda_a_coord(np.asarray(trayectoria, dtype=np.int64))
+    num_snapshots = len(valores)
+    frames = np.concatenate([
+        seleccionar_frames(num_snapshots, max_frames), num_snapshots + np.arange(len(trayectoria))
+    ])
+
+    # Fondo estático, dibujado una sola vez
+    canvas.draw()
+    fondo = canvas.copy_from_bbox(fig.bbox)
+
+    def dibujar(f):
+        canvas.restore_region(fondo)
+        if f < num_snapshots:
+            im.set_data(np.ma.MaskedArray(valores[f], mask=masks[f]))
+            episodio = int(episodios_valores[f])
+            dot_eps.set_data([episodio - 1], [epsilon_episodico[episodio - 1]])
+        else:
+            i = f - num_snapshots
+            episodio = num_episodios
+            im.set_data(np.ma.MaskedArray(valores[-1], mask=masks[-1]))
+            dot.set_data(tray_x[i:i + 1], tray_y[i:i + 1])
+            dot_eps.set_data([num_episodios], [epsilon_episodico[-1]])
+        titulo.set_text(f"Q-valor máximo por estado para el episodio {episodio}\n{params_str}")
+        for artista in (im, dot, titulo, dot_eps):
+            fig.draw_artist(artista)
+        return np.asarray(canvas.buffer_rgba())
+
+    # Muestra de colores (primer y último snapshot) para la paleta del GIF
+    muestra = np.concatenate([dibujar(0).copy(), dibujar(num_snapshots - 1).copy()])
+    escribir_frames((dibujar(f) for f in frames.tolist()), path, fps, muestra)
+    return len(frames)
+
+
+def escribir_frames(frames, path: str, fps: int = 10, muestra: np.ndarray = None) -> None:
+    """
+    Escribe una secuencia de frames RGBA (arrays alto x ancho x 4) como GIF, MP4 o carpeta de PNGs.
+    Para el GIF, la paleta de 256 colores se calcula una sola vez a partir de 'muestra'
+    (por defecto, el primer frame) y se aplica a todos los frames.
+    """
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension == ".gif":
+        frames = iter(frames)
+        primer_frame = next(frames)
+        paleta = Image.fromarray(primer_frame if muestra is None else muestra).convert("RGB").quantize(256)
+        # Cuantizar cada frame al leerlo para no mantener los frames RGB completos en memoria
+        cuantizar = lambda f: Image.fromarray(f).convert("RGB").quantize(palette=paleta, dither=Image.Dither.NONE)
+        primera = cuantizar(primer_frame)
+        imagenes = (cuantizar(f) for f in frames)
+        primera.save(path, save_all=True, append_images=imagenes, duration=1000 / fps, loop=0, optimize=False)
+
+    elif extension == ".mp4":
+        if shutil.which("ffmpeg") is None:
+            raise RuntimeError("Exportar a .mp4 requiere ffmpeg en el PATH (usar .gif o una carpeta de PNGs)")
+        proceso = None
+        for f in frames:
+            if proceso is None:
+                alto, ancho = f.shape[:2]
+                proceso = subprocess.Popen(
+                    ["ffmpeg", "-y", "-loglevel", "error",
+                     "-f", "rawvideo", "-pix_fmt", "rgba", "-s", f"{ancho}x{alto}", "-r", str(fps), "-i", "-",
+                     "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", "-pix_fmt", "yuv420p", "-vcodec", "libx264", path],
+                    stdin=subprocess.PIPE,
+                )
+            proceso.stdin.write(f.tobytes())
+        if proceso is not None:
+            proceso.stdin.close()
+            if proceso.wait() != 0:
+                raise RuntimeError(f"ffmpeg terminó con código {proceso.returncode}")
+
+    else:
+        os.makedirs(path, exist_ok=True)
+        for k, f in enumerate(frames):
+            Image.fromarray(f).save(os.path.join(path, f"frame_{k:05d}.png"), compress_level=1)